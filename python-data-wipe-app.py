@@ -9,13 +9,20 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import json
 import os
-import shutil
 import platform
 from datetime import datetime
 import threading
 import time
-import random
 import string
+from functools import lru_cache
+
+from wipe_engine import (WipeScheduler, DEFAULT_BUFFER_SIZE, DEFAULT_MAX_WORKERS,
+                         DEFAULT_FILE_WORKERS, DEFAULT_INFLIGHT_BYTES, new_asset, batch_progress)
+from wipe_verify import DEFAULT_VERIFY_MODE, VERIFY_MODES
+from wipe_journal import WipeJournal
+from wipe_store import RecordStore
+from wipe_events import ProgressBus, FRAME_INTERVAL_MS
+from wipe_metrics import write_metrics, format_eta
 
 class MultiAssetWipeApp:
     def __init__(self, root):
@@ -25,17 +32,35 @@ class MultiAssetWipeApp:
         self.root.configure(bg="#1e293b")
         
         # Data
-        self.assets = []
         self.pending_wipes = []  # Assets waiting to be wiped
-        self.data_file = "wipe_records.json"
+        self.pending_ids = set()  # Asset IDs in pending_wipes, for O(1) duplicate checks
+        self.data_file = "wipe_records.db"  # Append-only record store
+        self.legacy_data_file = "wipe_records.json"  # Imported once into the store
+        self.journal_file = "wipe_journal.json"  # Checkpoints of unfinished batches
+        self.metrics_files = ("wipe_metrics.json", "wipe_metrics.prom")  # Last batch, JSON and Prometheus
         self.is_wiping = False
+        self.buffer_size = DEFAULT_BUFFER_SIZE  # Overwrite buffer, 4-64 MiB
+        self.pattern_source = None  # Random pass source, None picks the fastest
+        self.file_workers = DEFAULT_FILE_WORKERS  # Files wiped at once within an asset
+        self.inflight_bytes = DEFAULT_INFLIGHT_BYTES  # File bytes queued per asset
+        self.scrub_rate = None  # Free-space scrub bytes/s target, None for full speed
+        self.records_page_size = 500  # Records loaded into the view at a time
+        self.oldest_shown_seq = None  # Store seq of the oldest record in the view
+        self.records_shown = 0
+        self.more_records = False  # Older records not yet loaded into the view
         
         # Load saved data
-        self.load_data()
+        self.store = RecordStore(self.data_file, self.legacy_data_file)
+        self.journal = WipeJournal(self.journal_file)
         
         # Setup UI
         self.setup_ui()
         
+        # Offer to pick up a batch that was interrupted last time
+        self.journal.settle(self.store)
+        if self.journal.pending_assets():
+            self.root.after(500, self.offer_resume)
+        
     def setup_ui(self):
         """Create main interface"""
         # Header
@@ -142,6 +167,20 @@ class MultiAssetWipeApp:
         tk.Label(left_scrollable, text=help_text, font=("Arial", 9, "italic"),
                 bg="#334155", fg="#94a3b8").pack(anchor=tk.W, padx=20, pady=(5, 0))
         
+        # Raw device mode (block devices are always wiped this way)
+        self.device_mode = tk.BooleanVar(value=False)
+        tk.Checkbutton(left_scrollable, text="Raw device / disk image (wipe every block)",
+                      variable=self.device_mode, font=("Arial", 10, "bold"),
+                      bg="#334155", fg="white", selectcolor="#1e293b",
+                      activebackground="#334155").pack(anchor=tk.W, padx=20, pady=(5, 0))
+        
+        # Free-space scrub after file deletion
+        self.scrub_free_space = tk.BooleanVar(value=False)
+        tk.Checkbutton(left_scrollable, text="Scrub free space after deleting files",
+                      variable=self.scrub_free_space, font=("Arial", 10, "bold"),
+                      bg="#334155", fg="white", selectcolor="#1e293b",
+                      activebackground="#334155").pack(anchor=tk.W, padx=20, pady=(2, 0))
+        
         # Wipe Standard
         tk.Label(left_scrollable, text="Wipe Standard *", font=("Arial", 11, "bold"),
                 bg="#334155", fg="white").pack(anchor=tk.W, padx=20, pady=(15, 5))
@@ -163,6 +202,16 @@ class MultiAssetWipeApp:
             tk.Label(left_scrollable, text=desc, font=("Arial", 8),
                     bg="#334155", fg="#94a3b8").pack(anchor=tk.W, padx=45)
         
+        # Verification
+        tk.Label(left_scrollable, text="Verification", font=("Arial", 11, "bold"),
+                bg="#334155", fg="white").pack(anchor=tk.W, padx=20, pady=(15, 5))
+        self.verify_mode = tk.StringVar(value=DEFAULT_VERIFY_MODE)
+        ttk.Combobox(left_scrollable, textvariable=self.verify_mode,
+                    values=list(VERIFY_MODES), state="readonly",
+                    font=("Arial", 11)).pack(fill=tk.X, padx=20, ipady=8)
+        tk.Label(left_scrollable, text="sample: random blocks | full: read back everything",
+                font=("Arial", 8), bg="#334155", fg="#94a3b8").pack(anchor=tk.W, padx=20)
+        
         # Buttons
         btn_frame = tk.Frame(left_scrollable, bg="#334155")
         btn_frame.pack(pady=20, fill=tk.X, padx=20)
@@ -231,12 +280,27 @@ class MultiAssetWipeApp:
                  bg="#6b7280", fg="white", font=("Arial", 11, "bold"),
                  padx=20, pady=12, cursor="hand2").pack(side=tk.LEFT, padx=5)
         
+        # Concurrency limit for the batch (assets on one device still run in turn)
+        tk.Label(queue_btn_frame, text="Parallel:", font=("Arial", 10, "bold"),
+                bg="#334155", fg="white").pack(side=tk.LEFT, padx=(15, 5))
+        self.parallel_assets = tk.IntVar(value=DEFAULT_MAX_WORKERS)
+        tk.Spinbox(queue_btn_frame, from_=1, to=32, width=4, textvariable=self.parallel_assets,
+                  font=("Arial", 11), bg="#1e293b", fg="white",
+                  buttonbackground="#334155").pack(side=tk.LEFT)
+        
         # Bottom: Completed Records
         records_frame = tk.Frame(right, bg="#334155")
         records_frame.grid(row=1, column=0, sticky="nsew")
         
-        tk.Label(records_frame, text="Completed Wipe Records", font=("Arial", 16, "bold"),
-                bg="#334155", fg="white").pack(pady=15)
+        records_header = tk.Frame(records_frame, bg="#334155")
+        records_header.pack(pady=15)
+        
+        tk.Label(records_header, text="Completed Wipe Records", font=("Arial", 16, "bold"),
+                bg="#334155", fg="white").pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.records_count_label = tk.Label(records_header, text="(0 records)",
+                                            font=("Arial", 12), bg="#334155", fg="#94a3b8")
+        self.records_count_label.pack(side=tk.LEFT)
         
         # Treeview with both scrollbars
         tree_frame = tk.Frame(records_frame, bg="#334155")
@@ -287,6 +351,12 @@ class MultiAssetWipeApp:
                  bg="#8b5cf6", fg="white", font=("Arial", 11, "bold"),
                  padx=20, pady=10, cursor="hand2").pack(side=tk.LEFT, padx=5)
         
+        # Large histories are loaded a page at a time, newest first
+        self.load_more_btn = tk.Button(record_btn_frame, text="⏫ Older", command=self.load_more_records,
+                                       bg="#6b7280", fg="white", font=("Arial", 11, "bold"),
+                                       padx=20, pady=10, cursor="hand2")
+        self.load_more_btn.pack(side=tk.LEFT, padx=5)
+        
         self.refresh_tree()
         self.update_queue_display()
         
@@ -525,6 +595,9 @@ class MultiAssetWipeApp:
         self.drive_path.delete(0, tk.END)
         self.asset_type.set("Laptop")
         self.wipe_standard.set("DoD 5220.22-M (3 passes)")
+        self.device_mode.set(False)
+        self.scrub_free_space.set(False)
+        self.verify_mode.set(DEFAULT_VERIFY_MODE)
     
     def add_to_queue(self):
         """Add asset to wipe queue"""
@@ -550,42 +623,30 @@ class MultiAssetWipeApp:
             return
         
         # Check duplicate in queue
-        if any(a['asset_id'] == asset_id for a in self.pending_wipes):
+        if asset_id in self.pending_ids:
             messagebox.showerror("Duplicate", f"Asset ID '{asset_id}' already in queue!")
             return
         
         # Check duplicate in records
-        if any(a['asset_id'] == asset_id for a in self.assets):
+        if asset_id in self.store:
             messagebox.showerror("Duplicate", f"Asset ID '{asset_id}' already wiped!")
             return
         
-        # Get standard
-        standard_text = self.wipe_standard.get()
-        if "3 passes" in standard_text:
-            passes = 3
-            standard = "DoD 5220.22-M"
-        elif "NIST" in standard_text:
-            passes = 1
-            standard = "NIST 800-88"
-        elif "7-Pass" in standard_text:
-            passes = 7
-            standard = "Random 7-Pass"
-        else:
-            passes = 1
-            standard = "Quick Wipe"
+        wiped_as = self.store.assets_for_serial(serial)
+        if wiped_as and not messagebox.askyesno(
+                "Already Wiped", f"Serial '{serial}' was already wiped as {', '.join(wiped_as)}.\n"
+                                 f"Wipe it again?"):
+            return
         
         # Add to queue
-        asset = {
-            "asset_id": asset_id,
-            "type": self.asset_type.get(),
-            "serial": serial,
-            "owner": self.owner_entry.get().strip() or "N/A",
-            "path": path,
-            "standard": standard,
-            "passes": passes
-        }
-        
-        self.pending_wipes.append(asset)
+        asset = new_asset(asset_id, serial, path, self.wipe_standard.get(),
+                          asset_type=self.asset_type.get(),
+                          owner=self.owner_entry.get().strip(),
+                          device=self.device_mode.get(),
+                          scrub_free_space=self.scrub_free_space.get(),
+                          verify=self.verify_mode.get())
+        
+        self.queue_asset(asset)
         self.update_queue_display()
         self.clear_form()
         
@@ -604,6 +665,7 @@ class MultiAssetWipeApp:
         
         if messagebox.askyesno("Confirm", f"Remove '{asset['asset_id']}' from queue?"):
             self.pending_wipes.pop(idx)
+            self.pending_ids.discard(asset['asset_id'])
             self.update_queue_display()
     
     def clear_queue(self):
@@ -613,15 +675,50 @@ class MultiAssetWipeApp:
             return
         
         if messagebox.askyesno("Confirm", f"Remove all {len(self.pending_wipes)} assets from queue?"):
-            self.pending_wipes.clear()
+            self.clear_pending()
             self.update_queue_display()
     
+    def queue_asset(self, asset):
+        """Append an asset to the queue and its lookup indexes"""
+        self.pending_wipes.append(asset)
+        self.pending_ids.add(asset['asset_id'])
+    
+    def clear_pending(self):
+        """Empty the queue and its lookup indexes"""
+        self.pending_wipes.clear()
+        self.pending_ids.clear()
+    
+    def offer_resume(self):
+        """Offer to requeue assets from an interrupted batch"""
+        interrupted = self.journal.pending_assets()
+        names = "\n".join([f"• {a['asset_id']} - {a['type']}" for a in interrupted[:10]])
+        if len(interrupted) > 10:
+            names += f"\n... and {len(interrupted) - 10} more"
+        
+        if messagebox.askyesno("Resume Interrupted Wipe",
+                               f"{len(interrupted)} assets were not finished last time:\n\n"
+                               f"{names}\n\n"
+                               f"Requeue them and resume from the last checkpoint?"):
+            for asset in interrupted:
+                if asset['asset_id'] not in self.pending_ids:
+                    self.queue_asset(asset)
+            self.update_queue_display()
+            messagebox.showinfo("Resumed", "Assets requeued. Click 'WIPE ALL' to continue.")
+        else:
+            self.journal.clear()
+    
     def update_queue_display(self):
         """Update queue listbox"""
         self.queue_listbox.delete(0, tk.END)
         
         for asset in self.pending_wipes:
             display = f"🔸 {asset['asset_id']} | {asset['type']} | {asset['serial']} | {asset['standard']} | {asset['path']}"
+            if asset.get('media') == 'flash':
+                display += f" [flash, requested {asset.get('requested_standard')}]"
+            if asset.get('mode') == 'device':
+                display += " [raw device]"
+            elif asset.get('scrub_free_space'):
+                display += " [+free space]"
             self.queue_listbox.insert(tk.END, display)
         
         self.queue_count_label.config(text=f"({len(self.pending_wipes)} assets)")
@@ -688,13 +785,13 @@ class MultiAssetWipeApp:
         total_assets = len(assets_to_wipe)
         
         # Clear queue
-        self.pending_wipes.clear()
+        self.clear_pending()
         self.update_queue_display()
         
         # Progress dialog
         progress_win = tk.Toplevel(self.root)
         progress_win.title("Batch Wipe in Progress")
-        progress_win.geometry("700x450")
+        progress_win.geometry("800x500")
         progress_win.configure(bg="#1e293b")
         progress_win.transient(self.root)
         progress_win.grab_set()
@@ -709,166 +806,66 @@ class MultiAssetWipeApp:
         
         overall_progress_var = tk.DoubleVar()
         overall_bar = ttk.Progressbar(progress_win, variable=overall_progress_var,
-                                      maximum=100, length=600)
+                                      maximum=100, length=700)
         overall_bar.pack(pady=5)
         
         overall_label = tk.Label(progress_win, text=f"0 / {total_assets} assets completed",
                                 font=("Arial", 11), bg="#1e293b", fg="#94a3b8")
         overall_label.pack(pady=5)
         
-        # Current asset
-        current_frame = tk.Frame(progress_win, bg="#334155")
-        current_frame.pack(fill=tk.X, padx=30, pady=15)
-        
-        current_asset_label = tk.Label(current_frame, text="",
-                                       font=("Arial", 12, "bold"), bg="#334155", fg="white")
-        current_asset_label.pack(pady=5)
+        # Per-asset progress, one row per job
+        jobs_frame = tk.Frame(progress_win, bg="#334155")
+        jobs_frame.pack(fill=tk.BOTH, expand=True, padx=30, pady=15)
         
-        status_label = tk.Label(current_frame, text="Initializing...",
-                               font=("Arial", 10), bg="#334155", fg="#fbbf24")
-        status_label.pack(pady=5)
-        
-        # Current asset progress
-        asset_progress_var = tk.DoubleVar()
-        asset_bar = ttk.Progressbar(current_frame, variable=asset_progress_var,
-                                    maximum=100, length=600)
-        asset_bar.pack(pady=10)
-        
-        asset_percent_label = tk.Label(current_frame, text="0%",
-                                       font=("Arial", 11, "bold"), bg="#334155", fg="#60a5fa")
-        asset_percent_label.pack()
-        
-        details_label = tk.Label(current_frame, text="",
-                                font=("Arial", 9), bg="#334155", fg="#94a3b8")
-        details_label.pack(pady=5)
+        job_columns = ("Asset", "Status", "Progress", "Details")
+        jobs_tree = ttk.Treeview(jobs_frame, columns=job_columns, show="headings", height=8)
+        for col, width in zip(job_columns, [150, 90, 80, 380]):
+            jobs_tree.heading(col, text=col)
+            jobs_tree.column(col, width=width, anchor=tk.W if col == "Details" else tk.CENTER)
+        jobs_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         tk.Label(progress_win, text="⚠️ DO NOT close this window or disconnect devices",
                 font=("Arial", 10, "bold"), bg="#1e293b", fg="#fbbf24").pack(pady=10)
         
-        def wipe_thread():
-            completed = 0
-            failed = []
-            
-            for asset_idx, asset in enumerate(assets_to_wipe):
-                if not progress_win.winfo_exists():
-                    return
-                
-                try:
-                    # Update current asset
-                    current_asset_label.config(
-                        text=f"Asset {asset_idx + 1}/{total_assets}: {asset['asset_id']} ({asset['type']})"
-                    )
-                    status_label.config(text="Scanning files...")
-                    asset_progress_var.set(0)
-                    
-                    # Scan files
-                    all_files = []
-                    total_size = 0
-                    path = asset['path']
-                    
-                    if os.path.isfile(path):
-                        all_files.append(path)
-                        total_size = os.path.getsize(path)
-                    elif os.path.isdir(path):
-                        for root, dirs, files in os.walk(path):
-                            for file in files:
-                                file_path = os.path.join(root, file)
-                                all_files.append(file_path)
-                                try:
-                                    total_size += os.path.getsize(file_path)
-                                except:
-                                    pass
-                    
-                    total_files = len(all_files)
-                    details_label.config(text=f"{total_files} files | {total_size/(1024*1024):.1f} MB")
-                    
-                    if total_files == 0:
-                        raise Exception("No files found")
-                    
-                    # Wipe files
-                    passes = asset['passes']
-                    
-                    for file_idx, file_path in enumerate(all_files):
-                        if not progress_win.winfo_exists():
-                            return
-                        
-                        status_label.config(text=f"Wiping: {os.path.basename(file_path)}")
-                        
-                        try:
-                            file_size = os.path.getsize(file_path)
-                            
-                            for pass_num in range(passes):
-                                details_label.config(text=f"Pass {pass_num+1}/{passes} | File {file_idx+1}/{total_files}")
-                                
-                                with open(file_path, 'r+b') as f:
-                                    if pass_num == 0:
-                                        f.write(b'\x00' * file_size)
-                                    elif pass_num == 1 and passes > 1:
-                                        f.write(b'\xFF' * file_size)
-                                    else:
-                                        f.write(os.urandom(file_size))
-                                    f.flush()
-                                    os.fsync(f.fileno())
-                                
-                                base = (file_idx / total_files) * 100
-                                pass_prog = ((pass_num + 1) / passes) * (100 / total_files)
-                                total_prog = min(base + pass_prog, 100)
-                                
-                                asset_progress_var.set(total_prog)
-                                asset_percent_label.config(text=f"{int(total_prog)}%")
-                            
-                            os.remove(file_path)
-                            
-                        except Exception as e:
-                            print(f"Error wiping {file_path}: {e}")
-                            continue
-                    
-                    # Remove directory
-                    if os.path.isdir(path):
-                        status_label.config(text="Removing directory...")
-                        try:
-                            shutil.rmtree(path, ignore_errors=True)
-                        except:
-                            pass
-                    
-                    # Save record
-                    cert_id = f"CERT-{datetime.now().strftime('%Y%m%d%H%M%S')}-{random.randint(1000,9999)}"
-                    
-                    record = {
-                        "asset_id": asset['asset_id'],
-                        "type": asset['type'],
-                        "serial": asset['serial'],
-                        "owner": asset['owner'],
-                        "path": asset['path'],
-                        "standard": asset['standard'],
-                        "passes": asset['passes'],
-                        "status": "completed",
-                        "start_time": datetime.now().isoformat(),
-                        "end_time": datetime.now().isoformat(),
-                        "certificate_id": cert_id
-                    }
-                    
-                    self.assets.append(record)
-                    self.save_data()
-                    self.refresh_tree()
-                    
-                    completed += 1
-                    
-                except Exception as e:
-                    failed.append(f"{asset['asset_id']}: {str(e)}")
-                    print(f"Error wiping {asset['asset_id']}: {e}")
-                
-                # Update overall progress
-                overall_progress_var.set((asset_idx + 1) / total_assets * 100)
-                overall_label.config(text=f"{asset_idx + 1} / {total_assets} assets completed")
+        # Workers only publish to the bus; all widget updates happen here on the Tk thread
+        bus = ProgressBus()
+        scheduler = WipeScheduler(assets_to_wipe, max_workers=self.parallel_assets.get(),
+                                  buffer_size=self.buffer_size,
+                                  pattern_source=self.pattern_source,
+                                  on_update=bus.update,
+                                  file_workers=self.file_workers,
+                                  inflight_bytes=self.inflight_bytes,
+                                  scrub_rate=self.scrub_rate,
+                                  journal=self.journal,
+                                  store=self.store)
+        
+        for idx, job in enumerate(scheduler.jobs):
+            jobs_tree.insert('', tk.END, iid=str(idx),
+                             values=(f"{job.asset_id} ({job.asset['type']})", "QUEUED", "0%", ""))
+        job_rows = {id(job): str(idx) for idx, job in enumerate(scheduler.jobs)}
+        finished = []
+        
+        # The scheduler saves each record from its worker, so records never wait on the UI
+        scheduler.on_complete = lambda job: bus.publish("complete", job)
+        
+        def show_job(job):
+            jobs_tree.item(job_rows[id(job)], values=(
+                f"{job.asset_id} ({job.asset['type']})",
+                job.status.upper(),
+                f"{int(job.progress)}%",
+                job.error or job.detail
+            ))
+        
+        def show_summary(jobs, error=None):
+            completed = sum(1 for job in jobs if job.status == "completed")
+            failed = [f"{job.asset_id}: {job.error}" for job in jobs if job.status == "failed"]
+            progress_win.destroy()
             
-            # Complete
-            self.is_wiping = False
-            
-            if progress_win.winfo_exists():
-                progress_win.destroy()
-            
-            if failed:
+            if error is not None:
+                messagebox.showerror("Batch Wipe Stopped",
+                                     f"The batch stopped with an error:\n{error}\n\n"
+                                     f"Completed: {completed}/{total_assets} assets")
+            elif failed:
                 messagebox.showwarning("Batch Wipe Complete",
                                       f"Completed: {completed}/{total_assets} assets\n"
                                       f"Failed: {len(failed)} assets\n\n"
@@ -879,6 +876,53 @@ class MultiAssetWipeApp:
                                   f"Total Assets Wiped: {completed}\n"
                                   f"All data is permanently unrecoverable!")
         
+        def render():
+            if not progress_win.winfo_exists():
+                scheduler.cancel()
+                return
+            
+            events = bus.drain()
+            for kind, job, payload in events:
+                if kind == "update":
+                    show_job(job)
+                elif kind == "complete":
+                    show_job(job)
+                    if job.status == "completed":
+                        self.show_record(job.record)
+                    elif job.record:
+                        messagebox.showerror("Error", job.error)  # Wiped, but not saved
+                    finished.append(job)
+                elif kind == "done":
+                    show_summary(*payload)
+                    return
+            
+            # Overall progress is weighted by bytes left, not by assets finished
+            if events:
+                percent, eta = batch_progress(scheduler.jobs)
+                overall_progress_var.set(percent)
+                overall_label.config(text=f"{len(finished)} / {total_assets} assets completed | "
+                                          f"ETA {format_eta(eta)}")
+            
+            progress_win.after(FRAME_INTERVAL_MS, render)
+        
+        def wipe_thread():
+            jobs = scheduler.jobs
+            error = None
+            try:
+                jobs = scheduler.run()
+                for metrics_file in self.metrics_files:
+                    try:
+                        write_metrics(metrics_file, [job.metrics for job in jobs])
+                    except OSError:
+                        pass  # Metrics are diagnostics; never fail a finished batch over them
+            except Exception as e:
+                error = e
+            finally:
+                # Always release the window, whose close button is disabled
+                self.is_wiping = False
+                bus.publish("done", payload=(jobs, error))
+        
+        render()
         thread = threading.Thread(target=wipe_thread, daemon=True)
         thread.start()
     
@@ -889,13 +933,32 @@ class MultiAssetWipeApp:
             messagebox.showwarning("No Selection", "Please select a record!")
             return
         
-        item = self.tree.item(selection[0])
-        asset_id = item['values'][0]
-        asset = next((a for a in self.assets if a['asset_id'] == asset_id), None)
+        asset_id = selection[0]  # Rows are keyed by asset ID
+        asset = self.store.get(asset_id)
         
         if not asset:
             return
         
+        # Optional stages recorded with the wipe
+        extra_details = ""
+        if asset.get('free_space_scrubbed') is not None:
+            extra_details += f"Free Space:      {asset['free_space_scrubbed']/(1024*1024):.1f} MB scrubbed\n"
+        if asset.get('hard_links_deduplicated'):
+            extra_details += (f"Hard Links:      {asset['hard_links_deduplicated']} extra names unlinked, "
+                              f"{asset['deduplicated_bytes']/(1024*1024):.1f} MB not rewritten\n")
+        if asset.get('hole_bytes_skipped'):
+            extra_details += (f"Sparse Holes:    {asset['hole_bytes_skipped']/(1024*1024):.1f} MB "
+                              f"skipped, never held data\n")
+        if asset.get('requested_standard', asset['standard']) != asset['standard']:
+            extra_details += f"Requested:       {asset['requested_standard']}\n"
+        if asset.get('discarded_bytes') is not None:
+            extra_details += (f"Media:           Flash, {asset['discarded_bytes']/(1024*1024):.1f} MB "
+                              f"discarded (TRIM) before a verified random pass\n")
+        verification = asset.get('verification')
+        if verification and verification['mode'] != "off":
+            extra_details += (f"Verification:    {verification['result'].upper()} "
+                              f"({verification['mode']} read-back, {verification['checked']} checked)\n")
+        
         cert = f"""
 {'='*75}
                     DATA WIPE CERTIFICATE
@@ -916,7 +979,7 @@ WIPE DETAILS
 Standard:        {asset['standard']}
 Passes:          {asset['passes']}
 Path Wiped:      {asset['path']}
-Start Time:      {datetime.fromisoformat(asset['start_time']).strftime('%Y-%m-%d %H:%M:%S')}
+{extra_details}Start Time:      {datetime.fromisoformat(asset['start_time']).strftime('%Y-%m-%d %H:%M:%S')}
 End Time:        {datetime.fromisoformat(asset['end_time']).strftime('%Y-%m-%d %H:%M:%S')}
 Status:          SUCCESSFULLY COMPLETED
 
@@ -946,7 +1009,7 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
     
     def export_records(self):
         """Export all records"""
-        if not self.assets:
+        if not self.store.count():
             messagebox.showwarning("No Data", "No records to export!")
             return
         
@@ -958,7 +1021,7 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         
         if filename:
             with open(filename, 'w') as f:
-                json.dump(self.assets, f, indent=2)
+                json.dump(self.store.all(), f, indent=2)
             messagebox.showinfo("Success", f"Records exported:\n{filename}")
     
     def delete_record(self):
@@ -969,45 +1032,66 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             return
         
         if messagebox.askyesno("Confirm", "Delete this record?"):
-            item = self.tree.item(selection[0])
-            asset_id = item['values'][0]
-            self.assets = [a for a in self.assets if a['asset_id'] != asset_id]
-            self.save_data()
-            self.refresh_tree()
+            asset_id = selection[0]
+            self.store.delete(asset_id)
+            self.tree.delete(asset_id)
+            self.records_shown -= 1
+            self.update_records_count()
             messagebox.showinfo("Success", "Record deleted!")
     
     def refresh_tree(self):
-        """Refresh the records tree"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        for asset in self.assets:
-            values = (
-                asset['asset_id'],
-                asset['type'],
-                asset['serial'],
-                asset['status'].upper(),
-                datetime.fromisoformat(asset['start_time']).strftime('%Y-%m-%d %H:%M'),
-                asset.get('certificate_id', 'N/A')
-            )
-            self.tree.insert('', tk.END, values=values, tags=(asset['status'],))
+        """Reload the records view with the newest page of records"""
+        self.tree.delete(*self.tree.get_children())
+        self.oldest_shown_seq = None
+        self.records_shown = 0
+        self.load_more_records()
     
-    def save_data(self):
-        """Save data to file"""
-        try:
-            with open(self.data_file, 'w') as f:
-                json.dump(self.assets, f, indent=2)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save: {e}")
+    def load_more_records(self):
+        """Add the next page of older records to the top of the view"""
+        rows = self.store.rows(self.oldest_shown_seq, self.records_page_size)
+        for seq, *row in rows:
+            if not self.tree.exists(row[0]):
+                self.tree.insert('', 0, iid=row[0], values=record_values(*row), tags=(row[3],))
+                self.records_shown += 1
+        if rows:
+            self.oldest_shown_seq = rows[-1][0]
+        self.more_records = len(rows) == self.records_page_size
+        self.update_records_count()
     
-    def load_data(self):
-        """Load data from file"""
-        try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    self.assets = json.load(f)
-        except:
-            self.assets = []
+    def show_record(self, record):
+        """Insert or update one record's row without touching the rest of the view"""
+        row = (record['asset_id'], record['type'], record['serial'], record['status'],
+               record['start_time'], record.get('certificate_id'))
+        if self.tree.exists(record['asset_id']):
+            self.tree.item(record['asset_id'], values=record_values(*row), tags=(record['status'],))
+        else:
+            self.tree.insert('', tk.END, iid=record['asset_id'], values=record_values(*row),
+                             tags=(record['status'],))
+            self.records_shown += 1
+        self.update_records_count()
+    
+    def update_records_count(self):
+        """Show how many records are loaded and whether older ones remain"""
+        total = self.store.count()
+        self.load_more_btn.config(state=tk.NORMAL if self.more_records else tk.DISABLED)
+        if self.records_shown >= total:
+            text = f"({total} records)"
+        else:
+            text = f"({self.records_shown} of {total} records)"
+        self.records_count_label.config(text=text)
+
+
+@lru_cache(maxsize=4096)
+def format_record_date(start_time):
+    """Display form of a record's ISO start time"""
+    return datetime.fromisoformat(start_time).strftime('%Y-%m-%d %H:%M')
+
+
+def record_values(asset_id, asset_type, serial, status, start_time, certificate_id):
+    """Row values for the records view"""
+    return (asset_id, asset_type, serial, status.upper(),
+            format_record_date(start_time), certificate_id or 'N/A')
+
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,184 @@
+"""
+Wipe Async - asyncio Orchestration of Asset Jobs
+Purpose: Run many queued assets and their event streams from one event loop
+Author: IT Security Team
+Version: 2.0
+
+Example:
+    orchestrator = AsyncWipeOrchestrator(store=RecordStore())
+    async for event in orchestrator.stream(assets, timeout=3600):
+        print(event)
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from wipe_engine import (AssetJob, FileWipePool, DEFAULT_BUFFER_SIZE, DEFAULT_MAX_WORKERS,
+                         DEFAULT_FILE_WORKERS, DEFAULT_INFLIGHT_BYTES, device_key, wipe_asset)
+from wipe_events import ProgressBus, FRAME_INTERVAL_MS
+
+DEFAULT_EVENT_QUEUE_SIZE = 1024  # Events buffered before the pump waits on the consumer
+
+
+def job_event(kind, job):
+    """Plain dict describing a job, safe to hand to other tasks"""
+    event = {"event": kind, "asset_id": job.asset_id, "status": job.status,
+             "progress": round(job.progress, 1), "detail": job.detail, "error": job.error,
+             "eta_seconds": None if job.eta_seconds is None else round(job.eta_seconds)}
+    if job.record:
+        event["certificate_id"] = job.record['certificate_id']
+    return event
+
+
+class AsyncWipeOrchestrator:
+    """Schedules asset jobs as coroutines; only running jobs hold an executor thread"""
+
+    # Waiting jobs are coroutines parked on a per-device lock and a global
+    # semaphore, so hundreds of queued assets cost no threads. Engine work
+    # runs in a bounded executor and reports through a coalescing
+    # ProgressBus; a pump task moves those reports into a bounded
+    # asyncio.Queue, so a slow consumer makes updates coalesce rather than
+    # pile up or slow the wipe. Without a stream() consumer nothing would
+    # ever empty that queue, so run() alone discards the events instead.
+
+    def __init__(self, store=None, journal=None, max_workers=DEFAULT_MAX_WORKERS,
+                 buffer_size=DEFAULT_BUFFER_SIZE, pattern_source=None,
+                 file_workers=DEFAULT_FILE_WORKERS, inflight_bytes=DEFAULT_INFLIGHT_BYTES,
+                 scrub_rate=None, event_queue_size=DEFAULT_EVENT_QUEUE_SIZE):
+        self.store = store
+        self.journal = journal
+        self.max_workers = max(1, max_workers)
+        self.buffer_size = buffer_size
+        self.pattern_source = pattern_source
+        self.file_workers = file_workers
+        self.inflight_bytes = inflight_bytes
+        self.scrub_rate = scrub_rate
+        self.events = asyncio.Queue(maxsize=event_queue_size)
+        self._bus = ProgressBus()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="wipe-async")
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._device_locks = {}
+        self._streams = 0  # Active stream() consumers
+
+    def _device_lock(self, path):
+        key = device_key(path)
+        if key not in self._device_locks:
+            self._device_locks[key] = asyncio.Lock()
+        return self._device_locks[key]
+
+    def _wipe_blocking(self, job, stop):
+        """Executor side of one job: the same engine call the GUI scheduler makes"""
+        pool = FileWipePool(self.file_workers, self.inflight_bytes,
+                            self.buffer_size, self.pattern_source)
+        try:
+            wipe_asset(job, pool, lambda: not stop.is_set(), self._bus.update,
+                       self.scrub_rate, self.journal, self.store)
+        finally:
+            pool.close()
+
+    async def run_job(self, asset, timeout=None):
+        """Wipe one asset; cancelling the task or hitting timeout stops it at a safe point"""
+        job = asset if isinstance(asset, AssetJob) else AssetJob(asset)
+        loop = asyncio.get_running_loop()
+        stop = threading.Event()
+
+        try:
+            async with self._device_lock(job.asset['path']), self._slots:
+                work = loop.run_in_executor(self._executor, self._wipe_blocking, job, stop)
+                try:
+                    await asyncio.wait_for(asyncio.shield(work), timeout)
+                except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+                    # The thread cannot be killed; ask it to stop and keep the
+                    # device locked until it has
+                    stop.set()
+                    await asyncio.shield(work)
+                    if not isinstance(e, asyncio.TimeoutError):
+                        raise
+                    if job.status == "cancelled":
+                        job.status = "failed"
+                        job.error = f"Timed out after {timeout:g}s"
+        except asyncio.CancelledError:
+            if not job.finished:
+                job.status = "cancelled"
+                job.error = "Cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            self._bus.publish("complete", job)
+        return job
+
+    async def _pump(self, finished):
+        """Move bus reports onto the bounded event queue, one frame at a time"""
+        while True:
+            for kind, job, _ in self._bus.drain():
+                if self._streams:
+                    await self.events.put(job_event(kind, job))
+            if finished.is_set():
+                return
+            try:
+                await asyncio.wait_for(finished.wait(), FRAME_INTERVAL_MS / 1000)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self, assets, timeout=None):
+        """Wipe every asset concurrently and return the jobs; cancelling stops them all"""
+        jobs = [AssetJob(asset) for asset in assets]
+        if self.journal:
+            self.journal.begin(assets)
+        finished = asyncio.Event()
+        pump = asyncio.create_task(self._pump(finished))
+        tasks = [asyncio.create_task(self.run_job(job, timeout)) for job in jobs]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # gather returns at the first cancelled child; wait until every
+            # job has really stopped writing before letting go
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Nobody may be reading any more, so only queue what fits
+            pump.cancel()
+            for kind, job, _ in self._bus.drain():
+                if not self._streams:
+                    break
+                try:
+                    self.events.put_nowait(job_event(kind, job))
+                except asyncio.QueueFull:
+                    break
+            raise
+        finished.set()
+        # Deliver the final events; only a live stream() consumer can make this wait
+        await pump
+        return jobs
+
+    async def stream(self, assets, timeout=None):
+        """Run assets and yield their events as they happen"""
+        self._streams += 1
+        runner = asyncio.create_task(self.run(assets, timeout))
+        getter = None
+        try:
+            while True:
+                getter = asyncio.ensure_future(self.events.get())
+                await asyncio.wait({getter, runner}, return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    yield getter.result()
+                    continue
+                getter.cancel()
+                while not self.events.empty():
+                    yield self.events.get_nowait()
+                break
+            runner.result()
+        finally:
+            self._streams -= 1
+            if getter is not None:
+                getter.cancel()
+            if not runner.done():
+                runner.cancel()
+                await asyncio.gather(runner, return_exceptions=True)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,377 @@
+"""
+Wipe Benchmarks - Throughput Measurements for the Wipe Engine
+Purpose: Compare pattern sources and engine changes with repeatable numbers
+Author: IT Security Team
+Version: 2.0
+
+Usage:
+    python wipe_bench.py patterns [--size-mb 16] [--seconds 2]
+    python wipe_bench.py tree [--shape tiny] [--standard nist] [--scale 1] [--output bench.json]
+    python wipe_bench.py tree --image /var/tmp/bench.img --image-mb 4096 --baseline bench.json
+    python wipe_bench.py tree --shape vm --standard random7 --backend stream --backend mmap
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+
+from wipe_engine import (AssetJob, FileWipePool, WIPE_STANDARDS, DEFAULT_FILE_WORKERS, MB,
+                         FILE_BACKENDS, new_asset, resolve_standard, wipe_asset)
+from wipe_patterns import PATTERN_SOURCES, available_sources, make_pattern_source
+from wipe_verify import DEFAULT_VERIFY_MODE, VERIFY_MODES
+
+GB = 1000 ** 3
+FILL_CHUNK = b'\x5a' * MB  # Non-zero so no filesystem can store the files sparsely
+
+
+def bench_patterns(buffer_size=16 * 1024 * 1024, seconds=2.0, names=None):
+    """Fill one reusable buffer from each source and return GB/s by name"""
+    buffer = memoryview(bytearray(buffer_size))
+    results = {}
+
+    for name in names or available_sources():
+        source = make_pattern_source(name)
+        try:
+            source.fill(buffer)  # Warm up
+            filled = 0
+            start = time.perf_counter()
+            while time.perf_counter() - start < seconds:
+                source.fill(buffer)
+                filled += buffer_size
+            results[name] = filled / (time.perf_counter() - start) / GB
+        finally:
+            source.close()
+
+    return results
+
+
+def _write_file(path, size):
+    with open(path, 'wb') as f:
+        while size > 0:
+            size -= f.write(FILL_CHUNK[:size])
+
+
+def build_tiny(root, scale):
+    """Many files of at most 4 KiB spread over a flat set of directories"""
+    rng = random.Random(0)
+    files = total = 0
+    for index in range(max(1, int(5000 * scale))):
+        directory = os.path.join(root, f"d{index % 50:02d}")
+        os.makedirs(directory, exist_ok=True)
+        size = rng.randint(0, 4096)
+        _write_file(os.path.join(directory, f"f{index}.bin"), size)
+        files += 1
+        total += size
+    return files, total
+
+
+def build_huge(root, scale):
+    """A few large files, the shape of disk images and database dumps"""
+    os.makedirs(root, exist_ok=True)
+    size = max(MB, int(128 * MB * scale))
+    for index in range(4):
+        _write_file(os.path.join(root, f"huge{index}.bin"), size)
+    return 4, 4 * size
+
+
+def build_deep(root, scale):
+    """Chains of nested directories 64 levels deep with a few small files at each level"""
+    files = total = 0
+    for chain in range(max(1, int(4 * scale))):
+        directory = os.path.join(root, f"chain{chain}")
+        for depth in range(64):
+            directory = os.path.join(directory, f"l{depth}")
+            os.makedirs(directory)
+            for index in range(4):
+                _write_file(os.path.join(directory, f"f{index}.bin"), 16 * 1024)
+                files += 1
+                total += 16 * 1024
+    return files, total
+
+
+def build_vm(root, scale):
+    """Two fully allocated disk images, the case the mmap backend is meant for"""
+    os.makedirs(root, exist_ok=True)
+    size = max(MB, int(512 * MB * scale))
+    for index in range(2):
+        _write_file(os.path.join(root, f"disk{index}.img"), size)
+    return 2, 2 * size
+
+
+def build_sparse(root, scale):
+    """Large files that are mostly holes, with 64 KiB of data every 16 MiB"""
+    os.makedirs(root, exist_ok=True)
+    size = max(16 * MB, int(128 * MB * scale))
+    count = 8
+    for index in range(count):
+        path = os.path.join(root, f"sparse{index}.bin")
+        with open(path, 'wb') as f:
+            for offset in range(0, size, 16 * MB):
+                f.seek(offset)
+                f.write(FILL_CHUNK[:64 * 1024])
+            f.truncate(size)
+    return count, count * size  # Apparent size, which is what the engine overwrites
+
+
+# Synthetic trees by name: builder(root, scale) -> (files, apparent bytes)
+TREE_SHAPES = {
+    "tiny": build_tiny,
+    "huge": build_huge,
+    "deep": build_deep,
+    "vm": build_vm,
+    "sparse": build_sparse,
+}
+
+
+def default_bench_dir():
+    """tmpfs when there is one, so the numbers measure the engine rather than a disk"""
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+@contextmanager
+def loop_image(image_path, size_mb):
+    """Create an ext4 image, mount it over a loop device and yield the mount point (root only)"""
+    with open(image_path, 'wb') as f:
+        f.truncate(size_mb * MB)
+    mount_point = tempfile.mkdtemp(prefix="wipe-bench-")
+    try:
+        subprocess.run(["mkfs.ext4", "-q", "-F", image_path], check=True, capture_output=True)
+        subprocess.run(["mount", "-o", "loop", image_path, mount_point],
+                       check=True, capture_output=True)
+        try:
+            yield mount_point
+        finally:
+            subprocess.run(["umount", mount_point], check=False, capture_output=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        detail = getattr(e, "stderr", b"") or b""
+        raise RuntimeError(f"Cannot mount loop image {image_path}: "
+                           f"{detail.decode(errors='replace').strip() or e}")
+    finally:
+        os.rmdir(mount_point)
+        os.remove(image_path)
+
+
+def read_proc_io():
+    """Counters from /proc/self/io (syscr/syscw are read and write syscalls), or {} off Linux"""
+    try:
+        with open("/proc/self/io") as f:
+            return {key: int(value) for key, value in
+                    (line.split(":") for line in f if ":" in line)}
+    except OSError:
+        return {}
+
+
+def reset_peak_rss():
+    """Reset the kernel's high-water mark so each run reports its own peak; False if unsupported"""
+    try:
+        with open("/proc/self/clear_refs", 'w') as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process, or None where it cannot be read"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if platform.system() == "Darwin" else peak * 1024  # macOS reports bytes
+
+
+def bench_tree(shape, standard, root, scale=1.0, pattern_source=None,
+               verify=DEFAULT_VERIFY_MODE, file_workers=DEFAULT_FILE_WORKERS, backend="stream"):
+    """Build one synthetic tree under root, wipe it through the engine and return the measurements"""
+    tree = os.path.join(root, f"wipe-bench-{shape}")
+    shutil.rmtree(tree, ignore_errors=True)
+    files, size = TREE_SHAPES[shape](tree, scale)
+
+    # Typed as a rotational disk so each standard runs its own passes even on
+    # flash-backed storage, where detection would collapse them to one
+    job = AssetJob(new_asset(f"bench-{shape}", "BENCH", tree, standard, asset_type="HDD",
+                             verify=verify))
+    pool = FileWipePool(file_workers, pattern_source=pattern_source, backend=backend)
+    # Peak RSS is only per run where the high-water mark can be reset
+    rss_is_per_run = reset_peak_rss()
+    io_before = read_proc_io()
+    start = time.perf_counter()
+    try:
+        wipe_asset(job, pool)
+    finally:
+        pool.close()
+        seconds = time.perf_counter() - start
+        shutil.rmtree(tree, ignore_errors=True)
+    io_after = read_proc_io()
+
+    metrics = job.metrics.to_dict()
+    written = metrics['bytes_written']
+    # /proc/self/io only counts read and write calls; durability barriers
+    # (fsync, fdatasync, syncfs) come from the engine's own latency histograms
+    syncs = sum(histogram['count'] for histogram in metrics['sync_latency_seconds'].values())
+    io = {key: io_after[key] - io_before[key] for key in io_after if key in io_before}
+    return {
+        "shape": shape,
+        "standard": job.asset['standard'],
+        "passes": job.asset['passes'],
+        "backend": backend,
+        "status": job.status,
+        "error": job.error,
+        "files": files,
+        "logical_bytes": size,
+        "bytes_written": written,
+        "seconds": round(seconds, 4),
+        "files_per_s": round(files / seconds, 1),
+        "mb_per_s": round(written / seconds / MB, 1),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "peak_rss_per_run": rss_is_per_run,
+        "syscalls": {"read": io.get("syscr"), "write": io.get("syscw"), "sync": syncs},
+        "io": io,
+    }
+
+
+def bench_trees(root, shapes=None, standards=None, scale=1.0, pattern_source=None,
+                verify=DEFAULT_VERIFY_MODE, file_workers=DEFAULT_FILE_WORKERS, on_result=None,
+                backends=None):
+    """Run every shape under every standard and backend and return the list of results"""
+    results = []
+    for shape in shapes or TREE_SHAPES:
+        for standard in standards or WIPE_STANDARDS:
+            for backend in backends or ("stream",):
+                result = bench_tree(shape, standard, root, scale, pattern_source, verify,
+                                    file_workers, backend)
+                results.append(result)
+                if on_result:
+                    on_result(result)
+    return results
+
+
+def _run_key(result):
+    return result['shape'], result['standard'], result.get('backend', "stream")
+
+
+def compare_results(results, baseline):
+    """Per-run percentage change in MB/s and files/s against an earlier results document"""
+    earlier = {_run_key(r): r for r in baseline.get("results", [])}
+    changes = []
+    for result in results:
+        old = earlier.get(_run_key(result))
+        if not old:
+            continue
+        change = {"shape": result['shape'], "standard": result['standard'],
+                  "backend": result['backend']}
+        for key in ("mb_per_s", "files_per_s"):
+            change[key] = (round((result[key] / old[key] - 1) * 100, 1) if old[key] else None)
+        changes.append(change)
+    return changes
+
+
+def _print_tree_result(result):
+    rss = result['peak_rss_bytes']
+    syscalls = result['syscalls']
+    print(f"{result['shape']:<8} {result['standard']:<15} {result['backend']:<7} {result['files']:>7} "
+          f"{result['files_per_s']:>10.1f} {result['mb_per_s']:>9.1f} "
+          f"{'-' if rss is None else f'{rss / MB:.0f}':>8} "
+          f"{'-' if syscalls['read'] is None else syscalls['read']:>9} "
+          f"{'-' if syscalls['write'] is None else syscalls['write']:>9} "
+          f"{syscalls['sync']:>6}"
+          + ("" if result['status'] == "completed" else f"  {result['status']}: {result['error']}"),
+          flush=True)
+
+
+def _run_tree(args):
+    standards = [resolve_standard(text)[0] for text in args.standard] if args.standard else None
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(f"{'Shape':<8} {'Standard':<15} {'Backend':<7} {'Files':>7} {'Files/s':>10} {'MB/s':>9} "
+          f"{'RSS MB':>8} {'Read sys':>9} {'Write sys':>9} {'Syncs':>6}")
+
+    def run(root):
+        return bench_trees(root, args.shape, standards, args.scale, args.pattern, args.verify,
+                           args.file_workers, _print_tree_result, args.backend)
+
+    if args.image:
+        with loop_image(args.image, args.image_mb) as root:
+            results = run(root)
+    else:
+        results = run(args.dir)
+
+    if baseline:
+        print("\nChange against baseline (%):")
+        if baseline.get("scale") != args.scale:
+            print(f"  (baseline was run at scale {baseline.get('scale')}, not {args.scale})")
+        for change in compare_results(results, baseline):
+            print(f"{change['shape']:<8} {change['standard']:<15} {change['backend']:<7} "
+                  f"MB/s {change['mb_per_s']:+.1f}  files/s {change['files_per_s']:+.1f}")
+
+    if args.output:
+        document = {"generated": time.time(), "platform": platform.platform(),
+                    "python": platform.python_version(), "scale": args.scale,
+                    "target": "loop image" if args.image else args.dir,
+                    "pattern": args.pattern, "verify": args.verify, "results": results}
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wipe engine benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    patterns = sub.add_parser("patterns", help="Compare random pattern sources in GB/s")
+    patterns.add_argument("--size-mb", type=int, default=16, help="Buffer size in MiB")
+    patterns.add_argument("--seconds", type=float, default=2.0, help="Time per source")
+    patterns.add_argument("--source", action="append", choices=list(PATTERN_SOURCES),
+                          help="Limit to this source (repeatable)")
+
+    tree = sub.add_parser("tree", help="Wipe synthetic file trees with each standard")
+    tree.add_argument("--shape", action="append", choices=list(TREE_SHAPES),
+                      help="Limit to this tree shape (repeatable)")
+    tree.add_argument("--standard", action="append",
+                      help="Limit to this standard, e.g. dod or nist (repeatable)")
+    tree.add_argument("--scale", type=float, default=1.0, help="Multiply file counts and sizes")
+    tree.add_argument("--dir", default=default_bench_dir(), help="Where trees are built")
+    tree.add_argument("--image", help="Build trees on an ext4 loop image at this path (root only)")
+    tree.add_argument("--image-mb", type=int, default=4096, help="Loop image size in MiB")
+    tree.add_argument("--pattern", choices=list(PATTERN_SOURCES),
+                      help="Random pass source (default: fastest available)")
+    tree.add_argument("--verify", choices=VERIFY_MODES, default=DEFAULT_VERIFY_MODE,
+                      help="Verification mode for every run")
+    tree.add_argument("--backend", action="append", choices=FILE_BACKENDS,
+                      help="File backend to run with (repeatable, default: stream)")
+    tree.add_argument("--file-workers", type=int, default=DEFAULT_FILE_WORKERS,
+                      help="Files wiped at once")
+    tree.add_argument("--output", help="Save results as JSON here")
+    tree.add_argument("--baseline", help="Earlier --output file to compare against")
+
+    args = parser.parse_args()
+
+    if args.command == "patterns":
+        results = bench_patterns(args.size_mb * 1024 * 1024, args.seconds, args.source)
+        print(f"{'Source':<12} {'GB/s':>8}")
+        for name, rate in sorted(results.items(), key=lambda kv: -kv[1]):
+            print(f"{name:<12} {rate:>8.2f}")
+    elif args.command == "tree":
+        _run_tree(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Wipe CLI - Headless Batch Wipes from a Manifest
+Purpose: Run the wipe engine on servers without a display and script large batches
+Author: IT Security Team
+Version: 2.0
+
+Usage:
+    python wipe_cli.py assets.csv [--parallel 4] [--json] [--yes]
+    python wipe_cli.py --resume [--yes]
+
+The manifest is CSV with a header row, or a JSON list of objects. Required
+fields are asset_id, serial, path and standard (e.g. "DoD 5220.22-M" or
+"dod"). Optional fields are type, owner, mode ("device" or "files"),
+scrub_free_space and verify. SSD and USB Drive assets, and any path on
+non-rotational media, are discarded (TRIM) and given one verified pass
+whatever the standard.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+
+from wipe_engine import (WipeScheduler, DEFAULT_MAX_WORKERS, DEFAULT_FILE_WORKERS, FILE_BACKENDS,
+                         new_asset, batch_progress)
+from wipe_events import ProgressBus
+from wipe_journal import WipeJournal
+from wipe_metrics import write_metrics, format_eta
+from wipe_patterns import PATTERN_SOURCES
+from wipe_store import RecordStore
+from wipe_verify import DEFAULT_VERIFY_MODE, VERIFY_MODES
+
+REQUIRED_FIELDS = ("asset_id", "serial", "path", "standard")
+PROGRESS_INTERVAL = 1.0  # Seconds between progress lines per batch
+CONFIRM_TEXT = "WIPE ALL"
+
+
+class ManifestError(Exception):
+    """Raised when a manifest cannot be turned into a wipe batch"""
+
+
+def _flag(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+
+def asset_from_entry(entry, verify=None):
+    """Validate one manifest entry and build its asset dict, raising ManifestError"""
+    entry = {key.strip().lower(): str(value).strip() if isinstance(value, (str, int)) else value
+             for key, value in entry.items() if key}
+    missing = [field for field in REQUIRED_FIELDS if not entry.get(field)]
+    if missing:
+        raise ManifestError(f"missing {', '.join(missing)}")
+    if not os.path.exists(entry['path']):
+        raise ManifestError(f"path does not exist: {entry['path']}")
+
+    verify_mode = verify or entry.get('verify') or DEFAULT_VERIFY_MODE
+    if verify_mode not in VERIFY_MODES:
+        raise ManifestError(f"unknown verify mode '{verify_mode}'")
+    try:
+        return new_asset(entry['asset_id'], entry['serial'], entry['path'], entry['standard'],
+                         asset_type=entry.get('type') or "Laptop",
+                         owner=entry.get('owner'),
+                         device=entry.get('mode') == "device",
+                         scrub_free_space=_flag(entry.get('scrub_free_space', False)),
+                         verify=verify_mode)
+    except ValueError as e:
+        raise ManifestError(str(e))
+
+
+def load_manifest(path, verify=None):
+    """Read a CSV or JSON manifest into asset dicts ready for WipeScheduler"""
+    try:
+        with open(path, 'r', newline='') as f:
+            if path.lower().endswith(".json"):
+                rows = json.load(f)
+            else:
+                rows = list(csv.DictReader(f))
+    except (OSError, ValueError) as e:
+        raise ManifestError(f"Cannot read manifest {path}: {e}")
+    if not isinstance(rows, list):
+        raise ManifestError(f"Manifest {path} must be a list of assets")
+
+    assets = []
+    seen = set()
+    for line, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            raise ManifestError(f"Entry {line}: expected an object with asset fields")
+        try:
+            asset = asset_from_entry(row, verify)
+        except ManifestError as e:
+            raise ManifestError(f"Entry {line}: {e}")
+        if asset['asset_id'] in seen:
+            raise ManifestError(f"Entry {line}: duplicate asset ID '{asset['asset_id']}'")
+        seen.add(asset['asset_id'])
+        assets.append(asset)
+    return assets
+
+
+def _print_event(job, as_json):
+    if as_json:
+        event = {"asset_id": job.asset_id, "status": job.status,
+                 "progress": round(job.progress, 1), "detail": job.error or job.detail,
+                 "eta_seconds": None if job.eta_seconds is None else round(job.eta_seconds)}
+        if job.finished and job.record:
+            event["certificate_id"] = job.record['certificate_id']
+        print(json.dumps(event), flush=True)
+    else:
+        print(f"[{job.asset_id}] {job.status.upper():<10} {int(job.progress):>3}%  "
+              f"{job.error or job.detail}", flush=True)
+
+
+def run_batch(assets, store, journal, args):
+    """Wipe assets, streaming progress to stdout; returns the finished jobs"""
+    bus = ProgressBus()
+    scheduler = WipeScheduler(assets, max_workers=args.parallel,
+                              pattern_source=args.pattern,
+                              on_update=bus.update,
+                              on_complete=lambda job: bus.publish("complete", job),
+                              file_workers=args.file_workers,
+                              journal=journal, file_backend=args.file_backend, store=store)
+
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(jobs=scheduler.run()), daemon=True)
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(PROGRESS_INTERVAL)
+            events = bus.drain()
+            for kind, job, _ in events:
+                if kind == "complete" or not job.finished:
+                    _print_event(job, args.json)
+            if events and not args.json and worker.is_alive():
+                percent, eta = batch_progress(scheduler.jobs)
+                print(f"[batch] {percent:5.1f}%  ETA {format_eta(eta)}", flush=True)
+    except KeyboardInterrupt:
+        print("Cancelling, waiting for in-flight writes to finish...", file=sys.stderr)
+        scheduler.cancel()
+        worker.join()
+    return result.get("jobs", scheduler.jobs)
+
+
+def _confirm(assets, args):
+    if args.yes:
+        return True
+    if not sys.stdin.isatty():
+        print("Refusing to wipe without --yes when not attached to a terminal", file=sys.stderr)
+        return False
+    for asset in assets:
+        print(f"  {asset['asset_id']}  {asset['type']}  {asset['serial']}  "
+              f"{asset['standard']}  {asset['path']}")
+    print(f"ALL DATA ON THESE {len(assets)} ASSETS WILL BE PERMANENTLY ERASED!")
+    return input(f"Type '{CONFIRM_TEXT}' to proceed: ") == CONFIRM_TEXT
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless multi-asset secure data wipe")
+    parser.add_argument("manifest", nargs="?", help="CSV or JSON list of assets to wipe")
+    parser.add_argument("--resume", action="store_true",
+                        help="Also requeue assets left unfinished in the journal")
+    parser.add_argument("--parallel", type=int, default=DEFAULT_MAX_WORKERS,
+                        help="Assets wiped at once (one device at a time)")
+    parser.add_argument("--file-workers", type=int, default=DEFAULT_FILE_WORKERS,
+                        help="Files wiped at once within an asset")
+    parser.add_argument("--file-backend", choices=FILE_BACKENDS, default="stream",
+                        help="'mmap' fills large files through a mapping instead of write calls")
+    parser.add_argument("--pattern", choices=list(PATTERN_SOURCES),
+                        help="Random pass source (default: fastest available)")
+    parser.add_argument("--verify", choices=VERIFY_MODES,
+                        help="Override every asset's verification mode")
+    parser.add_argument("--records", default="wipe_records.db", help="Record store path")
+    parser.add_argument("--journal", default="wipe_journal.json", help="Checkpoint journal path")
+    parser.add_argument("--metrics", help="Write per-asset metrics here (.prom for Prometheus, else JSON)")
+    parser.add_argument("--json", action="store_true", help="Print progress as JSON lines")
+    parser.add_argument("--yes", action="store_true", help="Skip the confirmation prompt")
+
+    args = parser.parse_args(argv)
+    if not args.manifest and not args.resume:
+        parser.error("a manifest is required unless --resume is given")
+
+    store = RecordStore(args.records)
+    journal = WipeJournal(args.journal)
+    try:
+        journal.settle(store)  # Recorded, but stopped before leaving the journal
+        assets = journal.pending_assets() if args.resume else []
+        queued = {asset['asset_id'] for asset in assets}
+        if args.manifest:
+            for asset in load_manifest(args.manifest, args.verify):
+                if asset['asset_id'] in queued:
+                    continue
+                if asset['asset_id'] in store:
+                    raise ManifestError(f"Asset ID '{asset['asset_id']}' already wiped")
+                queued.add(asset['asset_id'])
+                assets.append(asset)
+
+        if not assets:
+            print("No assets to wipe", file=sys.stderr)
+            return 0
+        if not _confirm(assets, args):
+            return 2
+
+        jobs = run_batch(assets, store, journal, args)
+        if args.metrics:
+            write_metrics(args.metrics, [job.metrics for job in jobs])
+    except ManifestError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        store.close()
+
+    completed = sum(1 for job in jobs if job.status == "completed")
+    failed = [job for job in jobs if job.status != "completed"]
+    if not args.json:
+        print(f"Completed: {completed}/{len(jobs)} assets"
+              + (f", not completed: {len(failed)}" if failed else ""))
+        for job in failed:
+            print(f"  {job.asset_id}: {job.status} {job.error or ''}".rstrip())
+    return 0 if not failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
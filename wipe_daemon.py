@@ -0,0 +1,489 @@
+"""
+Wipe Daemon - Shared Wipe Station Service
+Purpose: Let several technicians feed one wipe station through a local job queue
+Author: IT Security Team
+Version: 2.0
+
+Usage:
+    python wipe_daemon.py [--port 8765] [--token-file wipe_daemon.token] [--parallel 4] [--resume]
+    python wipe_daemon.py --socket /run/wipe.sock
+
+Over TCP every request must send "Authorization: Bearer <token>", where the
+token is read from --token-file (created with mode 0600 if missing), and a
+Host of 127.0.0.1:<port> or localhost:<port>. Requests carrying an Origin
+header are refused, so web pages cannot reach the API. On a Unix socket the
+socket's file permissions decide who may connect instead.
+
+Endpoints (JSON bodies and replies):
+    POST   /jobs             Submit {"assets": [...], "priority": 0} or a single asset
+    GET    /jobs             List every job with its status
+    GET    /jobs/<asset_id>  Status of one job
+    DELETE /jobs/<asset_id>  Cancel a queued or running job
+    GET    /events           Progress stream, one JSON object per line
+    GET    /metrics          Per-asset metrics as Prometheus text (?format=json for JSON)
+
+POST bodies must be sent as Content-Type: application/json.
+
+Assets use the manifest fields of wipe_cli.py. Higher priority runs first;
+jobs of equal priority run in submission order, one at a time per device.
+"""
+
+import argparse
+import heapq
+import hmac
+import itertools
+import json
+import os
+import secrets
+import signal
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from wipe_cli import ManifestError, asset_from_entry
+from wipe_engine import (AssetJob, FileWipePool, DEFAULT_BUFFER_SIZE, DEFAULT_MAX_WORKERS,
+                         DEFAULT_FILE_WORKERS, DEFAULT_INFLIGHT_BYTES, device_key, wipe_asset)
+from wipe_events import ProgressBus, FRAME_INTERVAL_MS
+from wipe_journal import WipeJournal
+from wipe_metrics import to_json, to_prometheus
+from wipe_store import RecordStore
+
+DEFAULT_PORT = 8765
+DEFAULT_TOKEN_FILE = "wipe_daemon.token"
+MAX_REQUEST_BYTES = 1024 * 1024
+
+
+def load_token(path):
+    """Shared API token from path, creating the file with mode 0600 if it is missing"""
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        if os.name == "posix" and os.stat(path).st_mode & 0o077:
+            raise ValueError(f"Token file {path} must not be readable by group or others")
+        with open(path, 'r') as f:
+            token = f.read().strip()
+        if not token:
+            raise ValueError(f"Token file {path} is empty")
+        return token
+    token = secrets.token_hex(32)
+    with os.fdopen(fd, 'w') as f:
+        f.write(token + "\n")
+    return token
+
+
+class ServiceJob(AssetJob):
+    """An asset job submitted to the daemon, with its queue position and cancel flag"""
+
+    def __init__(self, asset, priority=0):
+        super().__init__(asset)
+        self.priority = priority
+        self.submitted = datetime.now()
+        self.device = device_key(asset['path'])
+        self.cancel_requested = threading.Event()
+
+
+def job_snapshot(job):
+    """JSON-ready view of a job's current state"""
+    snapshot = {
+        "asset_id": job.asset_id,
+        "type": job.asset['type'],
+        "serial": job.asset['serial'],
+        "path": job.asset['path'],
+        "standard": job.asset['standard'],
+        "priority": job.priority,
+        "submitted": job.submitted.isoformat(),
+        "status": job.status,
+        "progress": round(job.progress, 1),
+        "eta_seconds": None if job.eta_seconds is None else round(job.eta_seconds),
+        "detail": job.detail,
+        "error": job.error,
+    }
+    if job.record:
+        snapshot["certificate_id"] = job.record['certificate_id']
+    return snapshot
+
+
+class WipeService:
+    """Priority job queue feeding the wipe engine, one running asset per device"""
+
+    def __init__(self, store, journal=None, max_workers=DEFAULT_MAX_WORKERS,
+                 buffer_size=DEFAULT_BUFFER_SIZE, pattern_source=None,
+                 file_workers=DEFAULT_FILE_WORKERS, inflight_bytes=DEFAULT_INFLIGHT_BYTES,
+                 scrub_rate=None):
+        self.store = store
+        self.journal = journal
+        self.max_workers = max(1, max_workers)
+        self.buffer_size = buffer_size
+        self.pattern_source = pattern_source
+        self.file_workers = file_workers
+        self.inflight_bytes = inflight_bytes
+        self.scrub_rate = scrub_rate
+        self.jobs = {}  # asset_id -> ServiceJob, including finished ones
+        self._heap = []  # (-priority, seq, job); cancelled entries are skipped when popped
+        self._seq = itertools.count()
+        self._busy_devices = set()
+        self._running = 0
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._subscribers = set()
+        self._subscribers_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="wipe-job")
+        self._dispatcher = threading.Thread(target=self._dispatch, name="wipe-dispatch",
+                                            daemon=True)
+
+    def start(self):
+        self._dispatcher.start()
+
+    def stop(self):
+        """Cancel running jobs and wait for them to stop at a safe point"""
+        with self._cond:
+            self._stopping = True
+            for job in self.jobs.values():
+                job.cancel_requested.set()
+            self._cond.notify_all()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+    def submit(self, assets, priority=0):
+        """Queue assets atomically; raises ValueError if any is already queued or wiped"""
+        with self._cond:
+            batch_ids = set()
+            for asset in assets:
+                if asset['asset_id'] in batch_ids:
+                    raise ValueError(f"Duplicate asset ID '{asset['asset_id']}' in one submission")
+                batch_ids.add(asset['asset_id'])
+                existing = self.jobs.get(asset['asset_id'])
+                if existing and not existing.finished:
+                    raise ValueError(f"Asset ID '{asset['asset_id']}' already queued")
+                if asset['asset_id'] in self.store:
+                    raise ValueError(f"Asset ID '{asset['asset_id']}' already wiped")
+
+            jobs = [ServiceJob(asset, priority) for asset in assets]
+            if self.journal:
+                self.journal.begin(assets)
+            for job in jobs:
+                self.jobs[job.asset_id] = job
+                heapq.heappush(self._heap, (-priority, next(self._seq), job))
+            self._cond.notify_all()
+
+        for job in jobs:
+            self._publish_update(job)
+        return jobs
+
+    def cancel(self, asset_id):
+        """Cancel a job; queued jobs never start, running ones stop before their next file"""
+        with self._cond:
+            job = self.jobs.get(asset_id)
+            if job is None or job.finished:
+                return job
+            job.cancel_requested.set()
+            if job.status != "queued":
+                return job
+            job.status = "cancelled"
+            job.error = "Cancelled"
+            job.end_time = datetime.now()
+            if self.journal:
+                self.journal.finish(asset_id)  # Never started, nothing to resume
+        self._publish("complete", job)
+        return job
+
+    def list_jobs(self):
+        with self._cond:
+            return list(self.jobs.values())
+
+    def subscribe(self):
+        """New event bus receiving every job change from now on"""
+        bus = ProgressBus()
+        with self._subscribers_lock:
+            self._subscribers.add(bus)
+        return bus
+
+    def unsubscribe(self, bus):
+        with self._subscribers_lock:
+            self._subscribers.discard(bus)
+
+    def _publish_update(self, job):
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for bus in subscribers:
+            bus.update(job)
+
+    def _publish(self, kind, job):
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for bus in subscribers:
+            bus.publish(kind, job)
+
+    def _next_job(self):
+        """Highest priority queued job whose device is idle, or None"""
+        skipped = []
+        found = None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            job = entry[2]
+            if job.status != "queued" or self.jobs.get(job.asset_id) is not job:
+                continue  # Cancelled or replaced while waiting
+            if job.device in self._busy_devices:
+                skipped.append(entry)
+                continue
+            found = job
+            break
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        return found
+
+    def _dispatch(self):
+        with self._cond:
+            while not self._stopping:
+                job = self._next_job() if self._running < self.max_workers else None
+                if job is None:
+                    self._cond.wait()
+                    continue
+                job.status = "wiping"
+                self._busy_devices.add(job.device)
+                self._running += 1
+                self._executor.submit(self._run, job)
+
+    def _run(self, job):
+        pool = FileWipePool(self.file_workers, self.inflight_bytes,
+                            self.buffer_size, self.pattern_source)
+        try:
+            wipe_asset(job, pool, lambda: not job.cancel_requested.is_set(),
+                       self._publish_update, self.scrub_rate, self.journal, self.store)
+        finally:
+            pool.close()
+            with self._cond:
+                self._busy_devices.discard(job.device)
+                self._running -= 1
+                self._cond.notify_all()
+            self._publish("complete", job)
+
+
+class WipeRequestHandler(BaseHTTPRequestHandler):
+    """JSON API over the service attached to the server"""
+
+    server_version = "WipeDaemon/2.0"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def address_string(self):
+        # Unix socket peers have no host/port
+        return self.client_address[0] if self.client_address else "local"
+
+    def _send_text(self, code, text, content_type):
+        data = text.encode()
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, code, body):
+        self._send_text(code, json.dumps(body), "application/json")
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_BYTES:
+            raise ValueError("Request too large")
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _allowed(self):
+        """Check the caller before anything else; sends the refusal and returns False if not"""
+        # Browsers add Origin to cross-site requests; no legitimate client sends it
+        if self.headers.get("Origin") is not None:
+            self._send_json(403, {"error": "Cross-origin requests are not allowed"})
+            return False
+        if self.server.token is None:
+            return True  # Unix socket: its permissions already decided
+        # A rebound DNS name still carries its own Host, so only the loopback names pass
+        if self.headers.get("Host") not in self.server.allowed_hosts:
+            self._send_json(403, {"error": "Unexpected Host header"})
+            return False
+        auth = self.headers.get("Authorization") or ""
+        scheme, _, token = auth.partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(),
+                                                                 self.server.token.encode()):
+            self._send_json(401, {"error": "Missing or wrong token"})
+            return False
+        return True
+
+    def _job_id(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "jobs":
+            return unquote(parts[1])
+        return None
+
+    def do_GET(self):
+        if not self._allowed():
+            return
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/jobs":
+            self._send_json(200, {"jobs": [job_snapshot(job) for job in self.service.list_jobs()]})
+        elif path == "/events":
+            self._stream_events()
+        elif path == "/metrics":
+            metrics = [job.metrics for job in self.service.list_jobs()]
+            if "format=json" in self.path:
+                self._send_text(200, to_json(metrics), "application/json")
+            else:
+                self._send_text(200, to_prometheus(metrics), "text/plain; version=0.0.4")
+        elif self._job_id() is not None:
+            job = self.service.jobs.get(self._job_id())
+            if job is None:
+                self._send_json(404, {"error": "No such job"})
+            else:
+                self._send_json(200, job_snapshot(job))
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if not self._allowed():
+            return
+        # A form or text/plain body is what a cross-site page can send without a preflight
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        if content_type != "application/json":
+            self._send_json(415, {"error": "Content-Type must be application/json"})
+            return
+        if self.path.split("?")[0].rstrip("/") != "/jobs":
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            body = self._read_json()
+            entries = body.get("assets", [body]) if isinstance(body, dict) else body
+            priority = int(body.get("priority", 0)) if isinstance(body, dict) else 0
+            assets = [asset_from_entry(entry) for entry in entries]
+        except (ValueError, AttributeError, ManifestError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        try:
+            jobs = self.service.submit(assets, priority)
+        except ValueError as e:
+            self._send_json(409, {"error": str(e)})
+            return
+        self._send_json(202, {"jobs": [job_snapshot(job) for job in jobs]})
+
+    def do_DELETE(self):
+        if not self._allowed():
+            return
+        asset_id = self._job_id()
+        job = self.service.cancel(asset_id) if asset_id is not None else None
+        if job is None:
+            self._send_json(404, {"error": "No such job"})
+        else:
+            self._send_json(200, job_snapshot(job))
+
+    def _stream_events(self):
+        """Newline-delimited JSON: every job now, then each change as it happens"""
+        bus = self.service.subscribe()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            for job in self.service.list_jobs():
+                self.wfile.write((json.dumps(job_snapshot(job)) + "\n").encode())
+            self.wfile.flush()
+            while True:
+                time.sleep(FRAME_INTERVAL_MS / 1000)
+                lines = [json.dumps(job_snapshot(job)) + "\n" for _, job, _ in bus.drain()]
+                if lines:
+                    self.wfile.write("".join(lines).encode())
+                    self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.service.unsubscribe(bus)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP over a Unix socket, so file permissions decide who may submit wipes"""
+
+    daemon_threads = True
+
+
+def make_server(service, port=DEFAULT_PORT, socket_path=None, token=None):
+    """HTTP server for the service on a Unix socket, or on localhost:port guarded by token"""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, WipeRequestHandler)
+        os.chmod(socket_path, 0o660)
+        server.token = None
+    else:
+        if not token:
+            raise ValueError("A token is required to serve over TCP")
+        server = ThreadingHTTPServer(("127.0.0.1", port), WipeRequestHandler)
+        server.daemon_threads = True
+        server.token = token
+        bound = server.server_address[1]
+        server.allowed_hosts = {f"127.0.0.1:{bound}", f"localhost:{bound}"}
+    server.service = service
+    return server
+
+
+def _stop_on_signal(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local wipe job service")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Localhost HTTP port")
+    parser.add_argument("--socket", help="Serve on this Unix socket instead of TCP")
+    parser.add_argument("--token-file", default=DEFAULT_TOKEN_FILE,
+                        help="Bearer token for TCP clients, created (mode 0600) if missing")
+    parser.add_argument("--parallel", type=int, default=DEFAULT_MAX_WORKERS,
+                        help="Assets wiped at once (one device at a time)")
+    parser.add_argument("--file-workers", type=int, default=DEFAULT_FILE_WORKERS,
+                        help="Files wiped at once within an asset")
+    parser.add_argument("--records", default="wipe_records.db", help="Record store path")
+    parser.add_argument("--journal", default="wipe_journal.json", help="Checkpoint journal path")
+    parser.add_argument("--resume", action="store_true",
+                        help="Requeue assets left unfinished in the journal")
+    args = parser.parse_args(argv)
+
+    token = None
+    if not args.socket:
+        try:
+            token = load_token(args.token_file)
+        except (OSError, ValueError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 2
+
+    store = RecordStore(args.records)
+    journal = WipeJournal(args.journal)
+    service = WipeService(store, journal, max_workers=args.parallel,
+                          file_workers=args.file_workers)
+    journal.settle(store)  # Recorded, but stopped before leaving the journal
+    if args.resume and journal.pending_assets():
+        service.submit(journal.pending_assets())
+    service.start()
+
+    server = make_server(service, args.port, args.socket, token)
+    signal.signal(signal.SIGTERM, _stop_on_signal)  # Service managers stop with SIGTERM
+    where = args.socket or f"http://127.0.0.1:{args.port}"
+    print(f"Wipe daemon listening on {where}", file=sys.stderr)
+    if token:
+        print(f"Clients must send the token in {args.token_file}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping, waiting for running jobs to reach a safe point...", file=sys.stderr)
+    finally:
+        server.server_close()
+        service.stop()
+        store.close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1335 @@
+"""
+Wipe Engine - Fixed-Buffer Overwrite Routines
+Purpose: Stream overwrite passes through one reusable buffer so memory stays flat
+Author: IT Security Team
+Version: 2.0
+"""
+
+import errno
+import logging
+import mmap
+import os
+import random
+import shutil
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from wipe_patterns import PatternSource, make_pattern_source
+from wipe_platform import (datasync, sync_batch, discard_range, is_rotational, data_extents,
+                           is_memory_backed)
+from wipe_verify import PassVerifier, VerificationError, DEFAULT_VERIFY_MODE
+from wipe_metrics import AssetMetrics, EwmaRate, format_eta
+
+log = logging.getLogger("wipe")
+
+MB = 1024 * 1024
+DEFAULT_BUFFER_SIZE = 16 * MB
+MIN_BUFFER_SIZE = 4 * MB
+MAX_BUFFER_SIZE = 64 * MB
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_FILE_WORKERS = 4
+DEFAULT_INFLIGHT_BYTES = 256 * MB
+MIN_FILE_COST = 4096  # Budget charged for tiny files so they can't queue without bound
+SMALL_FILE_THRESHOLD = 64 * 1024  # Files at or below this size are wiped in batches
+SMALL_FILE_BATCH = 64  # Files per batch, each holding an open descriptor
+DIRECT_ALIGNMENT = 4096  # O_DIRECT offsets and lengths, covers 512e and 4Kn sectors
+CHECKPOINT_BYTES = 256 * MB  # Progress is made durable and journaled this often
+CONSTANT_BUFFER_SIZE = 1 * MB  # One shared, pre-filled mapping per constant byte
+CONSTANT_IOV_COUNT = 64  # Slices of it per pwritev, so one call writes up to 64 MiB
+FILE_BACKENDS = ("stream", "mmap")  # How random passes reach large regular files
+MMAP_MIN_SIZE = 64 * MB  # Smaller files stay on the stream path
+MMAP_WINDOW = 64 * MB  # File bytes mapped at a time
+SCRUB_FILE_SIZE = 1024 * MB  # Free space is filled with files of up to this size
+SCRUB_MIN_RESERVE = 1024 * MB  # Free space always left for other workers...
+SCRUB_RESERVE_FRACTION = 0.05  # ...or this share of the volume, whichever is larger
+
+# Marker for passes that write random data instead of a constant byte
+RANDOM = "random"
+FLASH_ASSET_TYPES = ("SSD", "USB Drive")  # Always wiped with the flash strategy
+ROTATIONAL_ASSET_TYPES = ("HDD",)  # Always given the standard's passes
+FLASH_STANDARD = "Flash Discard + 1 Pass"  # Recorded instead of the requested standard on flash
+
+# Overwrite passes per supported wipe standard
+WIPE_STANDARDS = {
+    "DoD 5220.22-M": 3,
+    "NIST 800-88": 1,
+    "Random 7-Pass": 7,
+    "Quick Wipe": 1,
+}
+STANDARD_ALIASES = {"dod": "DoD 5220.22-M", "nist": "NIST 800-88",
+                    "random7": "Random 7-Pass", "quick": "Quick Wipe"}
+
+
+def resolve_standard(text):
+    """(standard, passes) for a standard name, short alias or label starting with a name"""
+    lowered = text.strip().lower()
+    if lowered in STANDARD_ALIASES:
+        lowered = STANDARD_ALIASES[lowered].lower()
+    for name, passes in WIPE_STANDARDS.items():
+        if lowered.startswith(name.lower()):
+            return name, passes
+    raise ValueError(f"Unknown wipe standard: {text}")
+
+
+def detect_media(asset_type, path):
+    """'flash' or 'rotational' from the asset type, else from sysfs; None when unknown"""
+    if asset_type in FLASH_ASSET_TYPES:
+        return "flash"
+    if asset_type in ROTATIONAL_ASSET_TYPES:
+        return "rotational"
+    rotational = is_rotational(path)
+    if rotational is None:
+        return None
+    return "rotational" if rotational else "flash"
+
+
+def new_asset(asset_id, serial, path, standard, asset_type="Laptop", owner="N/A",
+              device=False, scrub_free_space=False, verify=DEFAULT_VERIFY_MODE):
+    """Asset dict as queued for WipeScheduler, with the standard resolved to passes"""
+    requested, passes = resolve_standard(standard)
+    standard = requested
+    media = detect_media(asset_type, path)
+    if media == "flash":
+        # The controller remaps every write, so extra passes never reach the
+        # old cells and only wear the media: discard, then one verified pass.
+        # The record names what ran, not the standard that was asked for
+        standard, passes = FLASH_STANDARD, 1
+        if verify == "off":
+            verify = DEFAULT_VERIFY_MODE
+    return {
+        "asset_id": asset_id,
+        "type": asset_type,
+        "serial": serial,
+        "owner": owner or "N/A",
+        "path": path,
+        "standard": standard,
+        "requested_standard": requested,
+        "passes": passes,
+        "media": media,
+        "mode": "device" if device or is_block_device(path) else "files",
+        "scrub_free_space": scrub_free_space,
+        "verify": verify
+    }
+
+
+def pass_pattern(pass_num, passes, flash=False):
+    """Return the pattern for a pass: 0x00, then 0xFF, then random"""
+    if flash:
+        return RANDOM  # Discarded flash may read back zeros, so zeros would prove nothing
+    if pass_num == 0:
+        return b'\x00'
+    elif pass_num == 1 and passes > 1:
+        return b'\xFF'
+    return RANDOM
+
+
+def pattern_kind(pass_num, passes, flash=False):
+    """'random' or 'constant', the two speeds a pass can run at"""
+    return "random" if pass_pattern(pass_num, passes, flash) is RANDOM else "constant"
+
+
+def _pwrite(fd, data, offset):
+    """Positional write with a seek+write fallback for platforms without pwrite"""
+    if hasattr(os, 'pwrite'):
+        return os.pwrite(fd, data, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.write(fd, data)
+
+
+def _pwritev(fd, buffers, offset):
+    """Positional gather write, returning bytes written, with a pwrite loop fallback"""
+    if hasattr(os, 'pwritev'):
+        return os.pwritev(fd, buffers, offset)
+    written = 0
+    for buffer in buffers:
+        done = _pwrite(fd, buffer, offset + written)
+        written += done
+        if done < len(buffer):
+            break
+    return written
+
+
+class ConstantPattern:
+    """Read-only page-aligned buffer of one repeated byte, shared by every worker"""
+
+    # 0x00 and 0xFF passes need no per-file or per-thread buffer: every write
+    # is a pwritev of slices of the same mapping. A constant pattern looks
+    # the same at any offset, so a short write simply continues from where it
+    # stopped, and nothing is allocated per file or per pass.
+
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, byte, size=CONSTANT_BUFFER_SIZE):
+        self.size = size
+        self._map = mmap.mmap(-1, size)  # Anonymous mappings are page aligned and zeroed
+        if byte != b'\x00':
+            self._map.write(byte * size)
+        self.view = memoryview(self._map).toreadonly()
+        self._iov = [self.view] * CONSTANT_IOV_COUNT
+
+    @classmethod
+    def get(cls, byte):
+        """The shared buffer for a byte, created on first use"""
+        with cls._cache_lock:
+            if byte not in cls._cache:
+                cls._cache[byte] = cls(byte)
+            return cls._cache[byte]
+
+    def write(self, fd, length, offset):
+        """Write length bytes of the pattern at offset and return length"""
+        end = offset + length
+        while offset < end:
+            remaining = end - offset
+            if remaining >= self.size * CONSTANT_IOV_COUNT:
+                iov = self._iov
+            else:
+                full, tail = divmod(remaining, self.size)
+                iov = self._iov[:full] + [self.view[:tail]] if tail else self._iov[:full]
+            offset += _pwritev(fd, iov, offset)
+        return length
+
+
+def _map_window(fd, length, offset, populate=False):
+    """Shared writable mapping of part of a file, optionally prefaulted in one call"""
+    if os.name == 'nt':
+        return mmap.mmap(fd, length, offset=offset)
+    flags = mmap.MAP_SHARED
+    if populate:
+        flags |= getattr(mmap, 'MAP_POPULATE', 0)
+    return mmap.mmap(fd, length, flags=flags, prot=mmap.PROT_READ | mmap.PROT_WRITE,
+                     offset=offset)
+
+
+def _timed_sync(sync, fd, syncs):
+    """Run a durability barrier and note how long it took"""
+    started = time.perf_counter()
+    sync(fd)
+    syncs.append(time.perf_counter() - started)
+
+
+def is_block_device(path):
+    """True for block device nodes such as /dev/sdb"""
+    try:
+        return stat.S_ISBLK(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+def _open_device(device_path, direct):
+    """Open a device or image for writing, with O_DIRECT where the filesystem allows it"""
+    flags = os.O_RDWR | getattr(os, 'O_BINARY', 0)
+    if direct and hasattr(os, 'O_DIRECT'):
+        try:
+            return os.open(device_path, flags | os.O_DIRECT), True
+        except OSError as e:
+            if e.errno != errno.EINVAL:  # e.g. tmpfs does not support O_DIRECT
+                raise
+    return os.open(device_path, flags), False
+
+
+class PassResult:
+    """Outcome of a single overwrite pass"""
+
+    def __init__(self, bytes_written, seconds, syncs=(), skipped_bytes=0):
+        self.bytes_written = bytes_written
+        self.seconds = seconds
+        self.syncs = list(syncs)  # Latency of each durability barrier in the pass
+        self.skipped_bytes = skipped_bytes  # Holes in a sparse file, left unwritten
+
+    @property
+    def throughput(self):
+        """Bytes per second for this pass"""
+        if self.seconds <= 0:
+            return 0.0
+        return self.bytes_written / self.seconds
+
+    def __repr__(self):
+        return (f"PassResult({self.bytes_written} bytes, "
+                f"{self.throughput / MB:.1f} MB/s)")
+
+
+class OverwriteEngine:
+    """Overwrites files pass by pass; random passes go through one preallocated buffer"""
+
+    def __init__(self, buffer_size=DEFAULT_BUFFER_SIZE, random_source=None,
+                 checkpoint_bytes=CHECKPOINT_BYTES, backend="stream"):
+        buffer_size = max(MIN_BUFFER_SIZE, min(buffer_size, MAX_BUFFER_SIZE))
+        buffer_size -= buffer_size % DIRECT_ALIGNMENT
+        self.buffer_size = buffer_size
+        # Anonymous mappings are page aligned, as O_DIRECT requires
+        self.buffer = mmap.mmap(-1, buffer_size)
+        self.view = memoryview(self.buffer)
+        self.checkpoint_bytes = checkpoint_bytes
+        self.backend = backend
+
+        # Random passes draw from a pluggable source, by name or instance
+        if not isinstance(random_source, PatternSource):
+            random_source = make_pattern_source(random_source)
+        self.random_source = random_source
+
+    def close(self):
+        """Release the random source"""
+        self.random_source.close()
+
+    def write_pattern(self, fd, pattern, size, start=0, verifier=None):
+        """Write one pass of the pattern over size bytes of an open file from start"""
+        if pattern != RANDOM:
+            # Constant passes are verified by comparing bytes, so nothing to observe
+            return ConstantPattern.get(pattern).write(fd, size, start)
+
+        offset = start
+        end = start + size
+        while offset < end:
+            length = min(self.buffer_size, end - offset)
+            chunk = self.view[:length]
+            self.random_source.fill(chunk)
+            if verifier:
+                verifier.observe(offset, chunk)
+            done = 0
+            while done < length:
+                done += _pwrite(fd, chunk[done:], offset + done)
+            offset += length
+        return offset - start
+
+    def map_pattern(self, fd, pattern, size, start=0, verifier=None):
+        """Generate one random pass straight into the file's mapped pages and msync them"""
+        # The pattern source writes into the page cache itself, so the copy
+        # from a user buffer into the kernel that pwrite makes goes away.
+        # Windows are synced a checkpoint's worth at a time, so writeback of
+        # earlier windows overlaps generating the next ones.
+        # On tmpfs one populate call is far cheaper than a fault per 4 KiB page.
+        # On a disk it reads every old page in before overwriting it, which
+        # made the mapping slower than plain writes
+        populate = is_memory_backed(fd)
+        offset = start
+        end = start + size
+        mapped_windows = []
+        mapped_bytes = 0
+        try:
+            while offset < end:
+                base = offset - offset % mmap.ALLOCATIONGRANULARITY
+                length = min(MMAP_WINDOW, end - base)
+                mapped = _map_window(fd, length, base, populate)
+                mapped_windows.append(mapped)
+                with memoryview(mapped) as window:
+                    # Buffer-sized steps keep cipher sources at their usual scratch size
+                    for step in range(offset - base, length, self.buffer_size):
+                        with window[step:step + self.buffer_size] as region:
+                            self.random_source.fill(region)
+                            if verifier:
+                                verifier.observe(base + step, region)
+                offset = base + length
+                mapped_bytes += length
+                if mapped_bytes >= self.checkpoint_bytes or offset >= end:
+                    for mapped in mapped_windows:
+                        mapped.flush()  # msync(MS_SYNC)
+                    mapped_bytes = 0
+                    while mapped_windows:
+                        mapped_windows.pop().close()
+        finally:
+            for mapped in mapped_windows:
+                mapped.close()
+        return offset - start
+
+    def _can_map(self, fd, pattern, size):
+        """True when a pass over this file can go through the mmap backend"""
+        if self.backend != "mmap" or pattern != RANDOM or size < MMAP_MIN_SIZE:
+            return False
+        st = os.fstat(fd)
+        if not stat.S_ISREG(st.st_mode) or st.st_size < size:
+            return False
+        # Filling holes through a mapping allocates them a page fault at a time
+        blocks = getattr(st, 'st_blocks', None)
+        return blocks is None or blocks * 512 >= st.st_size
+
+    def overwrite_device(self, device_path, pattern, direct=True, on_progress=None,
+                         verify=None, start=0, on_checkpoint=None):
+        """Overwrite a block device or disk image end to end with one sequential pass"""
+        fd, is_direct = _open_device(device_path, direct)
+        try:
+            size = os.lseek(fd, 0, os.SEEK_END)
+            aligned_size = size - size % DIRECT_ALIGNMENT if is_direct else size
+            verifier = PassVerifier(size, pattern, verify) if verify and verify != "off" else None
+
+            started = time.perf_counter()
+            syncs = []
+            offset = start
+            last_checkpoint = start
+            while offset < aligned_size:
+                length = min(self.buffer_size, aligned_size - offset)
+                offset += self.write_pattern(fd, pattern, length, offset, verifier)
+                if on_checkpoint and offset - last_checkpoint >= self.checkpoint_bytes:
+                    _timed_sync(datasync, fd, syncs)
+                    on_checkpoint(offset)
+                    last_checkpoint = offset
+                if on_progress:
+                    on_progress(offset, size)
+
+            # The unaligned tail of an image file goes through the page cache
+            if offset < size:
+                tail_fd = os.open(device_path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+                try:
+                    offset += self.write_pattern(tail_fd, pattern, size - offset, offset, verifier)
+                    _timed_sync(os.fsync, tail_fd, syncs)
+                finally:
+                    os.close(tail_fd)
+                if on_progress:
+                    on_progress(offset, size)
+
+            _timed_sync(os.fsync, fd, syncs)
+            result = PassResult(offset - start, time.perf_counter() - started, syncs)
+        finally:
+            os.close(fd)
+
+        # Read back through a plain descriptor, O_DIRECT reads would need aligned buffers
+        if verifier:
+            read_fd = os.open(device_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+            try:
+                verifier.check(read_fd)
+            finally:
+                os.close(read_fd)
+        return result
+
+    def overwrite_file(self, file_path, pattern, size=None, verify=None, start=0,
+                       on_checkpoint=None, on_progress=None):
+        """Overwrite the data extents of a file in place with one pass of the pattern and fsync it"""
+        fd = os.open(file_path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+        try:
+            if size is None:
+                size = os.fstat(fd).st_size
+            # Holes never held data; writing them would only allocate them.
+            # Passes write nothing but extents, so every pass finds the same ones
+            extents = data_extents(fd, size)
+            verifier = None
+            if verify and verify != "off":
+                verifier = PassVerifier(size, pattern, verify, extents=extents)
+            write = self.map_pattern if self._can_map(fd, pattern, size) else self.write_pattern
+
+            started = time.perf_counter()
+            syncs = []
+            offset = start
+            written_total = 0
+            for extent_start, extent_length in extents:
+                offset = max(offset, extent_start)
+                extent_end = extent_start + extent_length
+                while offset < extent_end:
+                    # Durable checkpoints let an interrupted pass resume mid-file
+                    segment = extent_end - offset
+                    if on_checkpoint or on_progress:
+                        segment = min(segment, self.checkpoint_bytes)
+                    try:
+                        written = write(fd, pattern, segment, offset, verifier)
+                    except OSError:
+                        if write == self.write_pattern or written_total:
+                            raise
+                        # e.g. a filesystem that cannot map files; start the pass over
+                        write = self.write_pattern
+                        if verifier:
+                            verifier = PassVerifier(size, pattern, verify, extents=extents)
+                        continue
+                    offset += written
+                    written_total += written
+                    if on_progress:
+                        on_progress(written)
+                    if on_checkpoint and offset < size:
+                        _timed_sync(datasync, fd, syncs)
+                        on_checkpoint(offset)
+            _timed_sync(os.fsync, fd, syncs)
+            result = PassResult(written_total, time.perf_counter() - started, syncs,
+                                max(size - start, 0) - written_total)
+
+            if verifier:
+                verifier.check(fd)
+            return result
+        finally:
+            os.close(fd)
+
+
+class AssetJob:
+    """Progress and failure tracking for one queued asset"""
+
+    def __init__(self, asset):
+        self.asset = asset
+        self.status = "queued"  # queued, scanning, wiping, completed, failed, cancelled
+        self.total_files = 0
+        self.total_size = 0
+        self.scan_complete = False
+        self.scrubbed_bytes = 0
+        self.discarded_bytes = 0
+        self.hole_bytes_skipped = 0
+        self.hard_links = 0  # Extra names of inodes already being wiped
+        self.deduplicated_bytes = 0  # Their sizes, which are not rewritten
+        self.verified = 0
+        self.verify_failures = 0
+        self.files_done = 0
+        self.passes_done = 0
+        self.work_total = 0  # Bytes times passes the asset needs written
+        self.work_done = 0  # Including work credited from a resumed journal
+        self.pass_done = {}  # pass number -> bytes done in that pass
+        self.rate = EwmaRate()  # Smoothed bytes/s actually written
+        # Constant passes run several times faster than random ones, so each
+        # kind gets its own estimate and the ETA prices remaining passes apart
+        self.pattern_rates = {"constant": EwmaRate(), "random": EwmaRate()}
+        self._written = {"constant": 0, "random": 0}
+        self.progress = 0.0
+        self.current_file = ""
+        self.detail = ""
+        self.file_errors = []
+        self.error = None
+        self.record = None
+        self.start_time = None
+        self.end_time = None
+        self.metrics = AssetMetrics(asset)
+        self.lock = threading.Lock()
+
+    @property
+    def asset_id(self):
+        return self.asset['asset_id']
+
+    @property
+    def finished(self):
+        return self.status in ("completed", "failed", "cancelled")
+
+    @property
+    def flash(self):
+        return self.asset.get('media') == "flash"
+
+    def add_work(self, pass_num, written, credit=False):
+        """Count bytes done in a pass (credit=True for resumed work); hold job.lock from workers"""
+        self.pass_done[pass_num] = self.pass_done.get(pass_num, 0) + written
+        self.work_done += written
+        if self.work_total > 0:
+            self.progress = min(self.work_done / self.work_total * 100, 100)
+        if not credit:
+            kind = pattern_kind(pass_num, self.asset['passes'], self.flash)
+            self._written[kind] += written
+            self.pattern_rates[kind].update(self._written[kind])
+            self.rate.update(sum(self._written.values()))
+
+    @property
+    def eta_seconds(self):
+        """Seconds left, pricing each remaining pass at its pattern's rate; None until known"""
+        if self.finished:
+            return 0
+        passes = self.asset['passes']
+        per_pass = self.work_total / passes
+        rates = {kind: r.rate for kind, r in self.pattern_rates.items() if r.rate > 0}
+        if not rates:
+            return None
+        seconds = 0.0
+        for pass_num in range(passes):
+            remaining = per_pass - self.pass_done.get(pass_num, 0)
+            if remaining > 0:
+                kind = pattern_kind(pass_num, passes, self.flash)
+                # Until a kind has been timed, assume the slowest rate seen
+                seconds += remaining / rates.get(kind, min(rates.values()))
+        # Writing went on since the last sample
+        last = max(r.last_time for r in self.pattern_rates.values() if r.last_time is not None)
+        return max(seconds - (time.monotonic() - last), 0)
+
+
+class ByteBudget:
+    """Bounds the number of bytes handed to file workers but not yet wiped"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, amount):
+        """Block until amount fits; an oversized file may run once the pool is idle"""
+        amount = min(amount, self.limit)
+        with self._cond:
+            while self.in_flight and self.in_flight + amount > self.limit:
+                self._cond.wait()
+            self.in_flight += amount
+        return amount
+
+    def release(self, amount):
+        with self._cond:
+            self.in_flight -= amount
+            self._cond.notify_all()
+
+    def wait_idle(self):
+        """Block until every acquired byte has been released"""
+        with self._cond:
+            while self.in_flight:
+                self._cond.wait()
+
+
+class FilePlan:
+    """How the files of one asset are wiped and where results are reported"""
+
+    def __init__(self, passes, verify=None, on_pass=None, on_done=None, on_checkpoint=None,
+                 metrics=None, on_bytes=None, flash=False, should_continue=None):
+        self.passes = passes
+        self.verify = verify if verify != "off" else None
+        self.on_pass = on_pass  # (file_path, pass_num, PassResult)
+        self.on_done = on_done  # (file_path, error or None)
+        self.on_checkpoint = on_checkpoint  # (file_path, pass_num, durable offset)
+        self.metrics = metrics  # AssetMetrics, fed once per file pass or batch pass
+        self.on_bytes = on_bytes  # (pass_num, bytes just written), for byte-weighted progress
+        self.flash = flash  # One random pass, then wiped files are punched out
+        self.should_continue = should_continue or (lambda: True)  # Checked between segments
+        self.discarded_bytes = 0
+        self._lock = threading.Lock()
+
+    def pass_verify(self, pass_num):
+        """Verification mode for a pass; only the final pass is read back"""
+        return self.verify if pass_num == self.passes - 1 else None
+
+    def discard(self, fd):
+        """Punch out a wiped file so the SSD can erase its blocks; skipped where unsupported"""
+        try:
+            punched = discard_range(fd)
+        except OSError:
+            return
+        with self._lock:
+            self.discarded_bytes += punched
+
+    def done(self, file_path, error=None):
+        if self.on_done:
+            self.on_done(file_path, error)
+
+
+class FileWipePool:
+    """Overlaps open, write, fsync and unlink across the files of one asset"""
+
+    def __init__(self, workers=DEFAULT_FILE_WORKERS, inflight_bytes=DEFAULT_INFLIGHT_BYTES,
+                 buffer_size=DEFAULT_BUFFER_SIZE, pattern_source=None,
+                 small_file_threshold=SMALL_FILE_THRESHOLD, small_file_batch=SMALL_FILE_BATCH,
+                 backend="stream"):
+        self.workers = max(1, workers)
+        self.backend = backend
+        self.buffer_size = buffer_size
+        self.pattern_source = pattern_source
+        self.small_file_threshold = small_file_threshold
+        self.small_file_batch = max(1, small_file_batch)
+        self.budget = ByteBudget(inflight_bytes)
+        # A large file streams through one worker's buffer whatever its size, so
+        # it is charged a worker's share; its full size would stall the scan
+        self.max_file_cost = max(MIN_FILE_COST, inflight_bytes // self.workers)
+        self._batch = []  # Pending small files, filled by the submitting thread
+        self._batch_plan = None  # Every file in a batch shares one plan
+        self._local = threading.local()
+        self._engines = []
+        self._engines_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix="wipe-file")
+
+    def engine(self):
+        """One overwrite engine, and so one buffer, per calling thread"""
+        engine = getattr(self._local, "engine", None)
+        if engine is None:
+            engine = OverwriteEngine(self.buffer_size, self.pattern_source, backend=self.backend)
+            self._local.engine = engine
+            with self._engines_lock:
+                self._engines.append(engine)
+        return engine
+
+    def _wipe_file(self, file_path, file_size, plan, resume, cost):
+        error = None
+        try:
+            engine = self.engine()
+            first_pass, offset = resume or (0, 0)
+            for pass_num in range(first_pass, plan.passes):
+                verify = plan.pass_verify(pass_num)
+                # A read-back needs the whole pass observed, so a verified pass restarts at zero
+                start = offset if pass_num == first_pass and not verify else 0
+
+                on_checkpoint = None
+                if plan.on_checkpoint:
+                    on_checkpoint = (lambda durable, p=pass_num:
+                                     plan.on_checkpoint(file_path, p, durable))
+
+                def on_bytes(written, p=pass_num):
+                    if plan.on_bytes:
+                        plan.on_bytes(p, written)
+                    # Stop inside a large file too; the journal resumes it from its checkpoint
+                    if not plan.should_continue():
+                        raise WipeCancelled()
+
+                pattern = pass_pattern(pass_num, plan.passes, plan.flash)
+                result = engine.overwrite_file(file_path, pattern, file_size, verify, start,
+                                               on_checkpoint, on_bytes)
+                if plan.metrics:
+                    plan.metrics.record_pass(pass_num + 1, result)
+                if plan.on_pass:
+                    plan.on_pass(file_path, pass_num, result)
+                if plan.on_checkpoint and pass_num + 1 < plan.passes:
+                    plan.on_checkpoint(file_path, pass_num + 1, 0)
+            if plan.flash:
+                # Only after the verified pass; punching first would send the
+                # overwrite to newly allocated blocks instead of the old ones
+                fd = os.open(file_path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+                try:
+                    plan.discard(fd)
+                finally:
+                    os.close(fd)
+            os.remove(file_path)
+        except Exception as e:
+            error = e
+
+        # Report before releasing so drain() returns with every result recorded
+        try:
+            plan.done(file_path, error)
+        finally:
+            self.budget.release(cost)
+
+    def _wipe_batch(self, batch, plan, cost):
+        """Overwrite many small files pass by pass with one durability barrier per pass"""
+        open_files = []  # (fd, st_dev, file_path, file_size)
+
+        def finish(entry, error=None, unlink=False):
+            fd, _, file_path, _ = entry
+            if unlink and error is None and plan.flash:
+                plan.discard(fd)
+            os.close(fd)
+            if unlink and error is None:
+                try:
+                    os.remove(file_path)
+                except OSError as e:
+                    error = e
+            plan.done(file_path, error)
+
+        try:
+            for file_path, file_size in batch:
+                try:
+                    fd = os.open(file_path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+                except OSError as e:
+                    plan.done(file_path, e)
+                    continue
+                entry = (fd, None, file_path, file_size)
+                try:
+                    entry = (fd, os.fstat(fd).st_dev, file_path, file_size)
+                except OSError as e:
+                    finish(entry, e)
+                    continue
+                open_files.append(entry)
+
+            engine = self.engine()
+            for pass_num in range(plan.passes):
+                pattern = pass_pattern(pass_num, plan.passes, plan.flash)
+                verify = plan.pass_verify(pass_num)
+                verifiers = {}
+                start = time.perf_counter()
+                written = 0
+                for entry in list(open_files):
+                    if verify:
+                        verifiers[entry[0]] = PassVerifier(entry[3], pattern, verify)
+                    try:
+                        written += engine.write_pattern(entry[0], pattern, entry[3], 0,
+                                                        verifiers.get(entry[0]))
+                    except OSError as e:
+                        open_files.remove(entry)
+                        finish(entry, e)
+
+                # Every file of this pass must reach media before the next pattern
+                sync_started = time.perf_counter()
+                try:
+                    sync_batch([entry[0] for entry in open_files],
+                               [entry[1] for entry in open_files])
+                except OSError as e:
+                    while open_files:
+                        finish(open_files.pop(), e)
+                    break
+                syncs = [time.perf_counter() - sync_started]
+
+                for entry in list(open_files):
+                    if entry[0] in verifiers:
+                        try:
+                            verifiers[entry[0]].check(entry[0])
+                        except (OSError, VerificationError) as e:
+                            open_files.remove(entry)
+                            finish(entry, e)
+
+                result = PassResult(written, time.perf_counter() - start, syncs)
+                if plan.on_bytes:
+                    plan.on_bytes(pass_num, written)
+                if plan.metrics:
+                    plan.metrics.record_pass(pass_num + 1, result)
+                if plan.on_pass:
+                    for entry in open_files:
+                        plan.on_pass(entry[2], pass_num, result)
+
+            while open_files:
+                finish(open_files.pop(0), unlink=True)
+        except Exception as e:
+            while open_files:
+                finish(open_files.pop(), e)
+        finally:
+            self.budget.release(cost)
+
+    def _flush_batch(self):
+        """Hand the pending small files to a worker as one task"""
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        cost = self.budget.acquire(sum(max(size, MIN_FILE_COST) for _, size in batch))
+        try:
+            self._executor.submit(self._wipe_batch, batch, self._batch_plan, cost)
+        except Exception:
+            self.budget.release(cost)
+            raise
+
+    def submit(self, file_path, file_size, plan, resume=None):
+        """Queue one file for overwrite and unlink, blocking while the byte budget is full"""
+        # Small files restart from scratch, so a resume point only matters for large ones
+        if file_size <= self.small_file_threshold:
+            if self._batch and self._batch_plan is not plan:
+                self._flush_batch()
+            self._batch.append((file_path, file_size))
+            self._batch_plan = plan
+            if len(self._batch) >= self.small_file_batch:
+                self._flush_batch()
+            return
+
+        cost = self.budget.acquire(min(max(file_size, MIN_FILE_COST), self.max_file_cost))
+        try:
+            self._executor.submit(self._wipe_file, file_path, file_size, plan, resume, cost)
+        except Exception:
+            self.budget.release(cost)
+            raise
+
+    def drain(self):
+        """Wait until every submitted file has been wiped and reported"""
+        if self._batch:
+            self._flush_batch()
+        self.budget.wait_idle()
+
+    def close(self):
+        """Wait for queued files and release the worker buffers"""
+        self.drain()
+        self._executor.shutdown(wait=True)
+        for engine in self._engines:
+            engine.close()
+
+
+def build_record(job):
+    """Build the stored wipe record for a completed job"""
+    asset = job.asset
+    cert_id = f"CERT-{datetime.now().strftime('%Y%m%d%H%M%S')}-{random.randint(1000,9999)}"
+
+    return {
+        "asset_id": asset['asset_id'],
+        "type": asset['type'],
+        "serial": asset['serial'],
+        "owner": asset['owner'],
+        "path": asset['path'],
+        "standard": asset['standard'],
+        "requested_standard": asset.get('requested_standard', asset['standard']),
+        "passes": asset['passes'],
+        "mode": asset.get('mode', 'files'),
+        "free_space_scrubbed": job.scrubbed_bytes if asset.get('scrub_free_space') else None,
+        "media": asset.get('media'),
+        "discarded_bytes": job.discarded_bytes if job.flash else None,
+        "hole_bytes_skipped": job.hole_bytes_skipped,
+        "hard_links_deduplicated": job.hard_links,
+        "deduplicated_bytes": job.deduplicated_bytes,
+        "verification": {
+            "mode": asset.get('verify', DEFAULT_VERIFY_MODE),
+            "checked": job.verified,
+            "failed": job.verify_failures,
+            "result": "passed" if job.verified and not job.verify_failures else "not verified"
+        },
+        "status": "completed",
+        "start_time": job.start_time.isoformat(),
+        "end_time": job.end_time.isoformat(),
+        "certificate_id": cert_id
+    }
+
+
+class WipeCancelled(Exception):
+    """Raised inside a job when the batch is cancelled"""
+
+
+def scan_files(path):
+    """Yield (file_path, size, (st_dev, st_ino), link count) for each regular file under path"""
+    if os.path.isfile(path):
+        st = os.stat(path)
+        yield path, st.st_size, (st.st_dev, st.st_ino), st.st_nlink
+        return
+
+    stack = [path]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    # Symlinks and special files are not overwritten, only unlinked with the tree
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        yield entry.path, st.st_size, (st.st_dev, st.st_ino), st.st_nlink
+                except OSError:
+                    continue
+
+
+def _wipe_tree(job, pool, should_continue, notify, journal=None):
+    """Overwrite and unlink every regular file under the asset path"""
+    asset_id = job.asset_id
+    path = job.asset['path']
+    passes = job.asset['passes']
+    verify = job.asset.get('verify', DEFAULT_VERIFY_MODE)
+    resuming = journal.start(asset_id) if journal else False
+
+    job.detail = "Scanning files..."
+    notify(job)
+    current_pass = [0]
+
+    def describe():
+        # Totals still grow while the scan runs, hence the '+'
+        more = "" if job.scan_complete else "+"
+        job.detail = (f"Pass {current_pass[0]+1}/{passes} | File {job.files_done+1}/{job.total_files}{more} | "
+                      f"{job.rate.rate/MB:.1f} MB/s | ETA {format_eta(job.eta_seconds)}{more}")
+
+    def on_bytes(pass_num, written):
+        with job.lock:
+            job.add_work(pass_num, written)
+            describe()
+        notify(job)
+
+    def on_pass(file_path, pass_num, result):
+        with job.lock:
+            job.passes_done += 1
+            job.current_file = os.path.basename(file_path)
+            current_pass[0] = pass_num
+            if result.skipped_bytes:
+                # Holes count as done work, just not as throughput
+                job.add_work(pass_num, result.skipped_bytes, credit=True)
+                if pass_num == passes - 1:
+                    # Every pass skips the same holes; the record counts them once
+                    job.hole_bytes_skipped += result.skipped_bytes
+            if job.work_total == 0:
+                # Only empty files so far, so bytes say nothing; count passes
+                job.progress = min(job.passes_done / (job.total_files * passes) * 100, 100)
+            describe()
+        notify(job)
+
+    def on_file_done(file_path, error):
+        if isinstance(error, WipeCancelled):
+            return  # Left in place for a resume; the cancel is reported after the drain
+        with job.lock:
+            job.files_done += 1
+            if isinstance(error, VerificationError):
+                job.verify_failures += 1
+            elif error is None and verify != "off":
+                job.verified += 1
+            if error is not None:
+                job.file_errors.append(f"{file_path}: {error}")
+                failed.add(file_path)
+        if error is not None:
+            job.metrics.record_error(f"{file_path}: {error}")
+            log.warning("Error wiping %s: %s", file_path, error)
+        elif journal:
+            journal.file_done(asset_id, file_path)
+
+    def on_checkpoint(file_path, pass_num, offset):
+        journal.checkpoint(asset_id, file_path, pass_num, offset)
+
+    plan = FilePlan(passes, verify, on_pass, on_file_done,
+                    on_checkpoint if journal else None, job.metrics, on_bytes, job.flash,
+                    should_continue)
+
+    # Hard links share one inode, so each inode is overwritten once, under
+    # the first name the scan finds, and its other names are only unlinked
+    linked = {}  # (st_dev, st_ino) -> first path, for files with several links
+    extra_links = []  # (link path, first path)
+    failed = set()  # Paths whose wipe failed
+
+    # Wipe files on the pool while the scan is still streaming them in
+    for file_path, file_size, inode, links in scan_files(path):
+        if not should_continue():
+            break
+        # Checked for every file: the first name may be gone by now, dropping the count
+        first_path = linked.get(inode)
+        if first_path is not None:
+            extra_links.append((file_path, first_path))
+            with job.lock:
+                job.hard_links += 1
+                job.deduplicated_bytes += file_size
+            continue
+        if links > 1:
+            linked[inode] = file_path
+        resume = journal.resume_point(asset_id, file_path) if journal else None
+        with job.lock:
+            job.total_files += 1
+            job.total_size += file_size
+            job.work_total += file_size * passes
+            if resume and file_size > pool.small_file_threshold:
+                # Passes already durable count as done; a verified final pass restarts
+                done_pass, offset = resume
+                if done_pass == passes - 1 and verify != "off":
+                    offset = 0
+                for pass_num in range(done_pass):
+                    job.add_work(pass_num, file_size, credit=True)
+                job.add_work(done_pass, offset, credit=True)
+        pool.submit(file_path, file_size, plan, resume)
+
+    job.scan_complete = True
+    job.metrics.scan_done(job.total_files, job.deduplicated_bytes)
+
+    # Let in-flight files finish before reporting or removing anything
+    pool.drain()
+    job.discarded_bytes = plan.discarded_bytes
+
+    if not should_continue():
+        raise WipeCancelled()
+
+    if job.total_files == 0 and not resuming:
+        raise Exception("No files found")
+    # A resumed asset with nothing left was fully wiped by the run that stopped;
+    # it still needs its directory removed and its record
+
+    for link_path, first_path in extra_links:
+        if first_path in failed:
+            continue  # Kept with the unwiped data, so a rerun finds every name again
+        try:
+            os.remove(link_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            job.file_errors.append(f"{link_path}: {e}")
+            job.metrics.record_error(f"{link_path}: {e}")
+            log.warning("Error unlinking %s: %s", link_path, e)
+
+    # Wiped files are already unlinked; whatever failed stays in the tree for a
+    # rerun, and the asset gets no certificate for data that was never overwritten
+    if job.verify_failures:
+        raise VerificationError(f"Verification failed on {job.verify_failures} file(s)")
+    if failed:
+        raise Exception(f"{len(failed)} file(s) could not be wiped and were left in place")
+
+    # Remove directory
+    if os.path.isdir(path):
+        job.detail = "Removing directory..."
+        notify(job)
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _discard_device(path):
+    """Discard a whole device or image; returns bytes discarded, 0 where unsupported"""
+    fd = os.open(path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+    try:
+        return discard_range(fd)
+    except OSError as e:
+        log.warning("Discard not supported on %s (%s); relying on the overwrite pass", path, e)
+        return 0
+    finally:
+        os.close(fd)
+
+
+def _wipe_device(job, engine, should_continue, notify, journal=None):
+    """Overwrite a whole block device or disk image, leaving the node in place"""
+    asset_id = job.asset_id
+    path = job.asset['path']
+    passes = job.asset['passes']
+    verify = job.asset.get('verify', DEFAULT_VERIFY_MODE)
+
+    def on_progress(done, size):
+        if not should_continue():
+            raise WipeCancelled()
+        job.total_size = size
+        if not job.work_total:
+            job.work_total = passes * size
+            # Passes and offset recovered from the journal are already done
+            for earlier in range(first_pass):
+                job.add_work(earlier, size, credit=True)
+            job.add_work(pass_num, start, credit=True)
+        job.add_work(pass_num, done - job.pass_done.get(pass_num, 0))
+        job.detail = (f"Pass {pass_num+1}/{passes} | {done/MB:.0f}/{size/MB:.0f} MB | "
+                      f"{job.rate.rate/MB:.1f} MB/s | ETA {format_eta(job.eta_seconds)}")
+        if done >= size and pass_num == passes - 1 and verify != "off":
+            job.detail = f"Verifying ({verify} read-back)..."
+        notify(job)
+
+    def on_checkpoint(offset):
+        journal.checkpoint(asset_id, path, pass_num, offset)
+
+    job.total_files = 1
+    job.scan_complete = True
+    job.metrics.scan_done(1)
+    if job.flash:
+        # A device keeps its addresses, so discard first and let the verified
+        # pass prove every block was rewritten afterwards
+        job.detail = "Discarding (TRIM)..."
+        notify(job)
+        job.discarded_bytes = _discard_device(path)
+
+    first_pass, resume_offset = (journal and journal.resume_point(asset_id, path)) or (0, 0)
+    job.passes_done = first_pass
+    for pass_num in range(first_pass, passes):
+        # Only the final pass is read back; it is what remains on media
+        final_verify = verify if pass_num == passes - 1 else None
+        start = resume_offset if pass_num == first_pass and final_verify in (None, "off") else 0
+        result = engine.overwrite_device(path, pass_pattern(pass_num, passes, job.flash),
+                                         on_progress=on_progress, verify=final_verify, start=start,
+                                         on_checkpoint=on_checkpoint if journal else None)
+        job.metrics.record_pass(pass_num + 1, result)
+        job.passes_done += 1
+        if journal and pass_num + 1 < passes:
+            journal.checkpoint(asset_id, path, pass_num + 1, 0)
+    job.files_done = 1
+    if verify != "off":
+        job.verified = 1
+
+
+def scrub_free_space(directory, engine, pattern=RANDOM, reserve_bytes=None, max_rate=None,
+                     on_progress=None, should_continue=None):
+    """Fill free space on the volume with pattern files, then release them"""
+    should_continue = should_continue or (lambda: True)
+    usage = shutil.disk_usage(directory)
+    if reserve_bytes is None:
+        reserve_bytes = max(SCRUB_MIN_RESERVE, int(usage.total * SCRUB_RESERVE_FRACTION))
+    target = max(usage.free - reserve_bytes, 0)
+
+    scrub_dir = tempfile.mkdtemp(prefix=".wipe-scrub-", dir=directory)
+    start = time.perf_counter()
+    syncs = []
+    scrubbed = 0
+    try:
+        file_num = 0
+        while scrubbed < target:
+            # Other workers may be filling the volume too, so recheck before each file
+            room = shutil.disk_usage(directory).free - reserve_bytes
+            size = min(SCRUB_FILE_SIZE, target - scrubbed, room)
+            size -= size % DIRECT_ALIGNMENT
+            if size <= 0:
+                break
+
+            fill_path = os.path.join(scrub_dir, f"fill-{file_num:05d}")
+            file_num += 1
+            fd = os.open(fill_path, os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0))
+            try:
+                if hasattr(os, 'posix_fallocate'):
+                    try:
+                        os.posix_fallocate(fd, 0, size)
+                    except OSError as e:
+                        if e.errno == errno.ENOSPC:
+                            break
+                        if e.errno not in (errno.EINVAL, errno.EOPNOTSUPP):
+                            raise
+
+                offset = 0
+                while offset < size:
+                    if not should_continue():
+                        raise WipeCancelled()
+                    length = min(engine.buffer_size, size - offset)
+                    try:
+                        written = engine.write_pattern(fd, pattern, length, offset)
+                    except OSError as e:
+                        if e.errno != errno.ENOSPC:
+                            raise
+                        target = scrubbed  # Volume is full, nothing left to scrub
+                        break
+                    offset += written
+                    scrubbed += written
+
+                    # Hold to the throughput target so the scrub doesn't swamp the device
+                    elapsed = time.perf_counter() - start
+                    if max_rate and scrubbed / max_rate > elapsed:
+                        time.sleep(scrubbed / max_rate - elapsed)
+                    if on_progress:
+                        on_progress(scrubbed, target, time.perf_counter() - start)
+                _timed_sync(os.fsync, fd, syncs)
+            finally:
+                os.close(fd)
+    finally:
+        shutil.rmtree(scrub_dir, ignore_errors=True)
+
+    return PassResult(scrubbed, time.perf_counter() - start, syncs)
+
+
+def _scrub_stage(job, engine, should_continue, notify, max_rate):
+    """Scrub the free space left behind on the asset's volume"""
+    path = os.path.abspath(job.asset['path'])
+    directory = path if os.path.isdir(path) else os.path.dirname(path)
+    passes = job.asset['passes']
+
+    def on_progress(done, target, elapsed):
+        rate = done / elapsed / MB if elapsed > 0 else 0.0
+        job.detail = f"Scrubbing free space | {done/MB:.0f}/{target/MB:.0f} MB | {rate:.1f} MB/s"
+        notify(job)
+
+    job.detail = "Scrubbing free space..."
+    notify(job)
+    result = scrub_free_space(directory, engine, pass_pattern(passes - 1, passes, job.flash),
+                              max_rate=max_rate, on_progress=on_progress,
+                              should_continue=should_continue)
+    job.scrubbed_bytes = result.bytes_written
+    job.metrics.record_pass("scrub", result)
+
+
+def wipe_asset(job, pool, should_continue=None, on_update=None, scrub_rate=None, journal=None,
+               store=None):
+    """Wipe one asset, as a file tree or a raw device, updating the job and saving its record"""
+    should_continue = should_continue or (lambda: True)
+    notify = on_update or (lambda job: None)
+    asset = job.asset
+    job.start_time = datetime.now()
+    job.metrics.start()
+
+    try:
+        job.status = "wiping"
+        if asset.get('mode') == 'device' or is_block_device(asset['path']):
+            _wipe_device(job, pool.engine(), should_continue, notify, journal)
+        else:
+            _wipe_tree(job, pool, should_continue, notify, journal)
+            if asset.get('scrub_free_space'):
+                _scrub_stage(job, pool.engine(), should_continue, notify, scrub_rate)
+
+        job.end_time = datetime.now()
+        job.record = build_record(job)
+        job.status = "completed"
+        job.progress = 100
+
+    except WipeCancelled:
+        job.status = "cancelled"
+        job.error = "Cancelled"
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+        log.error("Error wiping %s: %s", asset['asset_id'], e)
+
+    # The journal entry is dropped only once the record is stored, so a crash
+    # in between leaves the asset to resume instead of wiped with no record
+    saved = True
+    if job.status == "completed" and store is not None:
+        try:
+            store.append(job.record)
+        except Exception as e:
+            saved = False
+            job.status = "failed"
+            job.error = f"Wiped, but the record was not saved: {e}"
+            log.error("Error saving the record of %s: %s", asset['asset_id'], e)
+
+    # Cancelled assets stay journaled so the next run can resume them
+    if journal:
+        if job.status == "cancelled" or not saved:
+            journal.flush()
+        else:
+            journal.finish(job.asset_id)
+
+    job.end_time = job.end_time or datetime.now()
+    job.metrics.finish(job.status)
+    notify(job)
+    return job
+
+
+def batch_progress(jobs):
+    """(percent, ETA seconds or None) for a batch, weighted by bytes still to write"""
+    known = [job.work_total for job in jobs if job.work_total > 0]
+    # Trees not scanned yet are assumed to be as big as the average known asset
+    guess = sum(known) / len(known) if known else 1
+    total = done = rate = 0
+    longest = None
+    for job in jobs:
+        size = job.work_total if job.work_total > 0 else guess
+        total += size
+        if job.finished:
+            done += size
+        else:
+            done += min(job.work_done, size)
+            if job.status == "wiping":
+                rate += job.rate.rate
+                eta = job.eta_seconds
+                if eta is not None:
+                    longest = max(longest or 0, eta)
+    percent = done / total * 100 if total else 0.0
+    if rate <= 0:
+        return percent, longest
+    # Never promise less than the slowest running asset needs on its own
+    return percent, max((total - done) / rate, longest or 0)
+
+
+def device_key(path):
+    """Identify the underlying block device of a path so one spindle gets one worker"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return path
+    # A device node lives on /dev; the disk it names is st_rdev
+    return st.st_rdev if stat.S_ISBLK(st.st_mode) else st.st_dev
+
+
+class WipeScheduler:
+    """Runs queued assets concurrently, serializing assets that share a device"""
+
+    def __init__(self, assets, max_workers=DEFAULT_MAX_WORKERS, buffer_size=DEFAULT_BUFFER_SIZE,
+                 pattern_source=None, on_update=None, on_complete=None, should_continue=None,
+                 file_workers=DEFAULT_FILE_WORKERS, inflight_bytes=DEFAULT_INFLIGHT_BYTES,
+                 small_file_threshold=SMALL_FILE_THRESHOLD, scrub_rate=None, journal=None,
+                 file_backend="stream", store=None):
+        self.jobs = [AssetJob(asset) for asset in assets]
+        self.max_workers = max(1, max_workers)
+        self.file_workers = file_workers
+        self.inflight_bytes = inflight_bytes
+        self.small_file_threshold = small_file_threshold
+        self.file_backend = file_backend
+        self.scrub_rate = scrub_rate  # Free-space scrub throughput target, bytes/s
+        self.journal = journal
+        self.store = store  # Completed records are saved here before leaving the journal
+        self.buffer_size = buffer_size
+        self.pattern_source = pattern_source
+        self.on_update = on_update
+        self.on_complete = on_complete
+        self.should_continue = should_continue or (lambda: True)
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        """Stop all workers before their next file"""
+        self._cancel.set()
+
+    def _keep_going(self):
+        return not self._cancel.is_set() and self.should_continue()
+
+    def device_groups(self):
+        """Group jobs by st_dev, keeping queue order inside each group"""
+        groups = {}
+        for job in self.jobs:
+            groups.setdefault(device_key(job.asset['path']), []).append(job)
+        return list(groups.values())
+
+    def _run_group(self, jobs):
+        """Wipe the assets of one device one after another"""
+        pool = FileWipePool(self.file_workers, self.inflight_bytes,
+                            self.buffer_size, self.pattern_source,
+                            small_file_threshold=self.small_file_threshold,
+                            backend=self.file_backend)
+        try:
+            for job in jobs:
+                if not self._keep_going():
+                    job.status = "cancelled"
+                    job.error = "Cancelled"
+                else:
+                    wipe_asset(job, pool, self._keep_going, self.on_update,
+                               self.scrub_rate, self.journal, self.store)
+                if self.on_complete:
+                    self.on_complete(job)
+        finally:
+            pool.close()
+
+    def run(self):
+        """Wipe every job and return them once all device groups finish"""
+        groups = self.device_groups()
+        if not groups:
+            return self.jobs
+
+        if self.journal:
+            self.journal.begin([job.asset for job in self.jobs])
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(groups)),
+                                thread_name_prefix="wipe-device") as pool:
+            for future in [pool.submit(self._run_group, jobs) for jobs in groups]:
+                future.result()
+
+        return self.jobs
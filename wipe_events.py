@@ -0,0 +1,50 @@
+"""
+Wipe Events - Progress Bus Between Wipe Workers and the UI
+Purpose: Let workers publish progress without blocking, for a UI to drain at its own pace
+Author: IT Security Team
+Version: 2.0
+"""
+
+import queue
+import threading
+
+FRAME_INTERVAL_MS = 100  # How often a UI drains the bus, about 10 frames per second
+
+
+class ProgressBus:
+    """Non-blocking queue of wipe events that coalesces repeated progress updates"""
+
+    # Progress updates carry only a key (usually the job). Only the first
+    # update per key is queued until the consumer drains it, after which it
+    # reads the job's latest state, so a file-heavy asset costs one queue
+    # entry per frame no matter how often its workers report.
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def update(self, key):
+        """Note that key's progress changed; cheap enough to call per file pass"""
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self._queue.put_nowait(("update", key, None))
+
+    def publish(self, kind, key=None, payload=None):
+        """Queue an event that must be delivered, e.g. an asset finishing"""
+        self._queue.put_nowait((kind, key, payload))
+
+    def drain(self):
+        """Every queued event in order, with at most one update per key"""
+        events = []
+        while True:
+            try:
+                kind, key, payload = self._queue.get_nowait()
+            except queue.Empty:
+                return events
+            if kind == "update":
+                with self._lock:
+                    self._pending.discard(key)
+            events.append((kind, key, payload))
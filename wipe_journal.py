@@ -0,0 +1,134 @@
+"""
+Wipe Journal - On-Disk Checkpoints for Resumable Batches
+Purpose: Survive crashes mid-batch and resume from the last durable point
+Author: IT Security Team
+Version: 2.0
+"""
+
+import json
+import os
+import threading
+import time
+
+CHECKPOINT_INTERVAL = 5.0  # Seconds between journal writes for routine checkpoints
+
+
+class WipeJournal:
+    """Tracks unfinished assets and the durable pass/offset of files being wiped"""
+
+    def __init__(self, path="wipe_journal.json", interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.assets = {}  # asset_id -> {"asset": {...}, "files": {path: [pass, offset]}}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        """Read the journal left by a previous run, if any"""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    self.assets = json.load(f).get("assets", {})
+        except (OSError, ValueError):
+            self.assets = {}
+
+    def _write(self):
+        """Atomically replace the journal file with the current state"""
+        self._last_flush = time.monotonic()
+        self._dirty = False
+        if not self.assets:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"assets": self.assets}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def flush(self, force=True):
+        """Write pending checkpoints now, or only once the interval has passed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            if force or time.monotonic() - self._last_flush >= self.interval:
+                self._write()
+
+    def pending_assets(self):
+        """Assets from an interrupted batch, in the order they were queued"""
+        with self._lock:
+            return [entry["asset"] for entry in self.assets.values()]
+
+    def settle(self, store):
+        """Drop assets whose record is already stored, e.g. after a crash before finish()"""
+        with self._lock:
+            done = [asset_id for asset_id in self.assets if asset_id in store]
+            for asset_id in done:
+                del self.assets[asset_id]
+            if done:
+                self._dirty = True
+                self._write()
+            return done
+
+    def begin(self, assets):
+        """Record a batch before it starts so nothing is lost if the app dies"""
+        with self._lock:
+            for asset in assets:
+                self.assets.setdefault(asset['asset_id'], {"asset": asset, "files": {}})
+            self._dirty = True
+            self._write()
+
+    def start(self, asset_id):
+        """Note that an asset began writing; True if an earlier run already had"""
+        with self._lock:
+            entry = self.assets.get(asset_id)
+            if entry is None:
+                return False
+            if entry.get("started"):
+                return True
+            entry["started"] = True
+            self._dirty = True
+            self._write()
+            return False
+
+    def resume_point(self, asset_id, file_path):
+        """(pass_num, offset) already durable for a file, or None to start fresh"""
+        with self._lock:
+            entry = self.assets.get(asset_id)
+            point = entry["files"].get(file_path) if entry else None
+            return tuple(point) if point else None
+
+    def checkpoint(self, asset_id, file_path, pass_num, offset):
+        """Note that a file is durable up to offset in pass_num"""
+        with self._lock:
+            entry = self.assets.get(asset_id)
+            if entry is None:
+                return
+            entry["files"][file_path] = [pass_num, offset]
+            self._dirty = True
+            if time.monotonic() - self._last_flush >= self.interval:
+                self._write()
+
+    def file_done(self, asset_id, file_path):
+        """Forget a file once it has been wiped and unlinked"""
+        with self._lock:
+            entry = self.assets.get(asset_id)
+            if entry and entry["files"].pop(file_path, None) is not None:
+                self._dirty = True
+
+    def finish(self, asset_id):
+        """Drop a finished asset from the journal"""
+        with self._lock:
+            if self.assets.pop(asset_id, None) is not None:
+                self._dirty = True
+                self._write()
+
+    def clear(self):
+        """Discard every unfinished asset"""
+        with self._lock:
+            self.assets = {}
+            self._write()
@@ -0,0 +1,257 @@
+"""
+Wipe Metrics - Per-Asset Throughput and Latency Instrumentation
+Purpose: Record what each pass of each asset cost and export it for fleet monitoring
+Author: IT Security Team
+Version: 2.0
+"""
+
+import json
+import os
+import threading
+import time
+
+# Upper bounds in seconds for the fsync latency histogram
+SYNC_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_ERRORS_KEPT = 20  # Most recent file error messages kept per asset
+RATE_HALF_LIFE = 3.0  # Seconds for an old throughput sample to lose half its weight
+RATE_MIN_INTERVAL = 0.5  # Shorter gaps are merged so bursts don't whipsaw the estimate
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets=SYNC_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(upper bound, observations at or below it) pairs, ending with +Inf"""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def to_dict(self):
+        return {"buckets": {("+Inf" if bound == float("inf") else str(bound)): count
+                            for bound, count in self.cumulative()},
+                "sum": round(self.sum, 6), "count": self.count}
+
+
+class EwmaRate:
+    """Exponentially weighted throughput estimate, used for ETAs"""
+
+    def __init__(self, half_life=RATE_HALF_LIFE, min_interval=RATE_MIN_INTERVAL):
+        self.half_life = half_life
+        self.min_interval = min_interval
+        self.rate = 0.0  # Units per second
+        self.last_time = None  # monotonic time of the last sample
+        self._last_done = 0
+
+    def update(self, done, now=None):
+        """Feed the running total of work done"""
+        now = time.monotonic() if now is None else now
+        if self.last_time is None:
+            self.last_time, self._last_done = now, done
+            return self.rate
+        elapsed = now - self.last_time
+        if elapsed < self.min_interval:
+            return self.rate
+
+        sample = (done - self._last_done) / elapsed
+        if self.rate <= 0:
+            self.rate = sample
+        else:
+            # Weight by elapsed time so irregular updates decay correctly
+            alpha = 1 - 0.5 ** (elapsed / self.half_life)
+            self.rate += alpha * (sample - self.rate)
+        self.last_time, self._last_done = now, done
+        return self.rate
+
+    def eta(self, remaining, now=None):
+        """Seconds to finish remaining work at the current estimate, or None"""
+        if self.rate <= 0:
+            return None
+        # Work keeps going between samples, so count down from the last one
+        now = time.monotonic() if now is None else now
+        return max(max(remaining, 0) / self.rate - (now - self.last_time), 0)
+
+
+def format_eta(seconds):
+    """Short human form of a duration, e.g. '1h 05m' or '42s'"""
+    if seconds is None:
+        return "--"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class AssetMetrics:
+    """Counters for one asset, updated from any worker thread"""
+
+    def __init__(self, asset):
+        self.asset_id = asset['asset_id']
+        self.asset_type = asset.get('type', "")
+        self.serial = asset.get('serial', "")
+        self.status = "queued"
+        self.started = None
+        self.seconds = 0.0
+        self.scan_seconds = None
+        self.files = 0
+        self.deduplicated_bytes = 0  # Hard-linked names not rewritten
+        self.file_errors = 0
+        self.errors = []
+        self.passes = {}  # pass label -> [bytes, busy seconds]
+        self.skipped_bytes = 0  # Sparse-file holes left unwritten, over all passes
+        self.sync_latency = {}  # pass label -> Histogram
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.status = "running"
+        self.started = time.perf_counter()
+
+    def finish(self, status):
+        self.status = status
+        if self.started is not None:
+            self.seconds = time.perf_counter() - self.started
+
+    def scan_done(self, files, deduplicated_bytes=0):
+        self.files = files
+        self.deduplicated_bytes = deduplicated_bytes
+        if self.started is not None:
+            self.scan_seconds = time.perf_counter() - self.started
+
+    def record_pass(self, label, result):
+        """Add one PassResult under a pass label (1-based pass number or a stage name)"""
+        with self._lock:
+            totals = self.passes.setdefault(str(label), [0, 0.0])
+            totals[0] += result.bytes_written
+            totals[1] += result.seconds
+            self.skipped_bytes += result.skipped_bytes
+            if result.syncs:
+                histogram = self.sync_latency.setdefault(str(label), Histogram())
+                for latency in result.syncs:
+                    histogram.observe(latency)
+
+    def record_error(self, message):
+        with self._lock:
+            self.file_errors += 1
+            self.errors.append(message)
+            del self.errors[:-MAX_ERRORS_KEPT]
+
+    def to_dict(self):
+        with self._lock:
+            passes = {label: {"bytes": written,
+                              "seconds": round(seconds, 6),
+                              "mb_per_s": round(written / seconds / 1024 / 1024, 2) if seconds > 0 else 0.0}
+                      for label, (written, seconds) in self.passes.items()}
+            return {
+                "asset_id": self.asset_id,
+                "type": self.asset_type,
+                "serial": self.serial,
+                "status": self.status,
+                "seconds": round(self.seconds, 6),
+                "scan_seconds": None if self.scan_seconds is None else round(self.scan_seconds, 6),
+                "files": self.files,
+                "deduplicated_bytes": self.deduplicated_bytes,
+                "bytes_written": sum(totals[0] for totals in self.passes.values()),
+                "hole_bytes_not_written": self.skipped_bytes,
+                "file_errors": self.file_errors,
+                "recent_errors": list(self.errors),
+                "passes": passes,
+                "sync_latency_seconds": {label: histogram.to_dict()
+                                         for label, histogram in self.sync_latency.items()},
+            }
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    return "{" + ",".join(f'{key}="{_label_value(value)}"' for key, value in labels.items()) + "}"
+
+
+def to_prometheus(metrics):
+    """Prometheus text exposition for a list of AssetMetrics"""
+    snapshots = [m.to_dict() for m in metrics]
+    lines = []
+
+    def family(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+
+    def asset_labels(snap, extra=None):
+        labels = {"asset_id": snap['asset_id'], "serial": snap['serial'], "type": snap['type']}
+        labels.update(extra or {})
+        return _labels(labels)
+
+    family("wipe_asset_seconds", "gauge", "Wall time spent wiping the asset",
+           [f"wipe_asset_seconds{asset_labels(s, {'status': s['status']})} {s['seconds']}"
+            for s in snapshots])
+    family("wipe_scan_seconds", "gauge", "Time until the file scan finished",
+           [f"wipe_scan_seconds{asset_labels(s)} {s['scan_seconds']}"
+            for s in snapshots if s['scan_seconds'] is not None])
+    family("wipe_files", "gauge", "Files found on the asset",
+           [f"wipe_files{asset_labels(s)} {s['files']}" for s in snapshots])
+    family("wipe_deduplicated_bytes", "gauge", "Bytes of hard-linked names not rewritten",
+           [f"wipe_deduplicated_bytes{asset_labels(s)} {s['deduplicated_bytes']}" for s in snapshots])
+    family("wipe_file_errors_total", "counter", "Files that could not be wiped",
+           [f"wipe_file_errors_total{asset_labels(s)} {s['file_errors']}" for s in snapshots])
+    family("wipe_pass_bytes_total", "counter", "Bytes written per pass",
+           [f"wipe_pass_bytes_total{asset_labels(s, {'pass': label})} {p['bytes']}"
+            for s in snapshots for label, p in s['passes'].items()])
+    family("wipe_hole_bytes_not_written_total", "counter",
+           "Sparse-file hole bytes not written, summed over all passes",
+           [f"wipe_hole_bytes_not_written_total{asset_labels(s)} {s['hole_bytes_not_written']}"
+            for s in snapshots])
+    family("wipe_pass_seconds_total", "counter", "Worker seconds spent writing per pass",
+           [f"wipe_pass_seconds_total{asset_labels(s, {'pass': label})} {p['seconds']}"
+            for s in snapshots for label, p in s['passes'].items()])
+
+    samples = []
+    for s in snapshots:
+        for label, histogram in s['sync_latency_seconds'].items():
+            for bound, count in histogram['buckets'].items():
+                samples.append(f"wipe_sync_latency_seconds_bucket"
+                               f"{asset_labels(s, {'pass': label, 'le': bound})} {count}")
+            samples.append(f"wipe_sync_latency_seconds_sum"
+                           f"{asset_labels(s, {'pass': label})} {histogram['sum']}")
+            samples.append(f"wipe_sync_latency_seconds_count"
+                           f"{asset_labels(s, {'pass': label})} {histogram['count']}")
+    family("wipe_sync_latency_seconds", "histogram", "fsync/fdatasync/syncfs latency per pass",
+           samples)
+
+    return "\n".join(lines) + "\n"
+
+
+def to_json(metrics):
+    """JSON document for a list of AssetMetrics"""
+    return json.dumps({"generated": time.time(), "assets": [m.to_dict() for m in metrics]},
+                      indent=2)
+
+
+def write_metrics(path, metrics):
+    """Atomically write metrics, as Prometheus text for .prom files and JSON otherwise"""
+    text = to_prometheus(metrics) if path.endswith(".prom") else to_json(metrics)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
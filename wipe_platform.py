@@ -0,0 +1,151 @@
+"""
+Wipe Platform - OS-Specific Durability Helpers
+Purpose: Wrap syscalls the os module does not expose, with portable fallbacks
+Author: IT Security Team
+Version: 2.0
+"""
+
+import ctypes
+import errno
+import os
+import stat
+import struct
+import sys
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+BLKDISCARD = 0x1277  # _IO(0x12, 119): discard a byte range of a block device
+FALLOC_FL_KEEP_SIZE = 0x01
+FALLOC_FL_PUNCH_HOLE = 0x02
+MEMORY_FILESYSTEMS = ("tmpfs", "ramfs", "hugetlbfs")  # Page cache is the only copy
+
+
+def _load_libc_function(name, argtypes):
+    """Look up a libc function on Linux, or return None when unavailable"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        func = getattr(libc, name)
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = argtypes
+    func.restype = ctypes.c_int
+    return func
+
+
+_syncfs = _load_libc_function("syncfs", [ctypes.c_int])
+_fallocate = _load_libc_function("fallocate64", [ctypes.c_int, ctypes.c_int,
+                                                 ctypes.c_int64, ctypes.c_int64])
+
+
+def _check(result):
+    if result != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+
+
+def datasync(fd):
+    """Flush file data (not timestamps) to media, falling back to fsync"""
+    if hasattr(os, "fdatasync"):
+        os.fdatasync(fd)
+    else:
+        os.fsync(fd)
+
+
+def sync_batch(fds, devices=None):
+    """Durability barrier for many open files: one syncfs per filesystem, else fdatasync each"""
+    if _syncfs is None:
+        for fd in fds:
+            datasync(fd)
+        return
+
+    if devices is None:
+        devices = [os.fstat(fd).st_dev for fd in fds]
+
+    synced = set()
+    for fd, device in zip(fds, devices):
+        if device not in synced:
+            _check(_syncfs(fd))
+            synced.add(device)
+
+
+def discard_range(fd, offset=0, length=None):
+    """Tell the media a range holds no data: BLKDISCARD on devices, a punched hole in files"""
+    if length is None:
+        length = os.lseek(fd, 0, os.SEEK_END) - offset
+    if length <= 0:
+        return 0
+    if stat.S_ISBLK(os.fstat(fd).st_mode):
+        if fcntl is None:
+            raise OSError(errno.EOPNOTSUPP, "BLKDISCARD is not available on this platform")
+        fcntl.ioctl(fd, BLKDISCARD, struct.pack("QQ", offset, length))
+    else:
+        if _fallocate is None:
+            raise OSError(errno.EOPNOTSUPP, "Hole punching is not available on this platform")
+        # Filesystems mounted with discard pass the freed blocks on to the SSD
+        _check(_fallocate(fd, FALLOC_FL_PUNCH_HOLE | FALLOC_FL_KEEP_SIZE, offset, length))
+    return length
+
+
+def data_extents(fd, size):
+    """(offset, length) regions below size that hold data; one extent where holes can't be found"""
+    if not hasattr(os, 'SEEK_DATA'):
+        return [(0, size)] if size > 0 else []
+    extents = []
+    offset = 0
+    try:
+        while offset < size:
+            try:
+                start = os.lseek(fd, offset, os.SEEK_DATA)
+            except OSError as e:
+                if e.errno == errno.ENXIO:  # Nothing but a hole from here to the end
+                    break
+                raise
+            if start >= size:
+                break
+            end = min(os.lseek(fd, start, os.SEEK_HOLE), size)
+            extents.append((start, end - start))
+            offset = end
+    except OSError:
+        return [(0, size)] if size > 0 else []  # e.g. a filesystem without SEEK_DATA
+    return extents
+
+
+def is_memory_backed(fd):
+    """True when an open file lives on a RAM filesystem such as tmpfs, from mountinfo"""
+    device = os.fstat(fd).st_dev
+    key = f"{os.major(device)}:{os.minor(device)}"
+    try:
+        with open("/proc/self/mountinfo") as f:
+            for line in f:
+                fields = line.split()
+                if fields[2] == key:
+                    return fields[fields.index("-") + 1] in MEMORY_FILESYSTEMS
+    except (OSError, ValueError, IndexError):
+        pass
+    return False
+
+
+def is_rotational(path):
+    """True for spinning disks, False for flash, None when sysfs cannot tell (e.g. tmpfs)"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    device = st.st_rdev if stat.S_ISBLK(st.st_mode) else st.st_dev
+    if os.major(device) == 0:  # tmpfs, overlayfs and other virtual filesystems
+        return None
+
+    node = os.path.realpath(f"/sys/dev/block/{os.major(device)}:{os.minor(device)}")
+    # Partitions have no queue of their own; the parent disk does
+    for directory in (node, os.path.dirname(node)):
+        try:
+            with open(os.path.join(directory, "queue", "rotational")) as f:
+                return f.read().strip() == "1"
+        except OSError:
+            continue
+    return None
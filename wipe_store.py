@@ -0,0 +1,153 @@
+"""
+Wipe Store - Append-Only Wipe Record Storage
+Purpose: Keep wipe records in SQLite (WAL) so each save is O(1) and crash-safe
+Author: IT Security Team
+Version: 2.0
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+# Columns the records view needs, kept outside the JSON body so listing
+# records never has to decode full history
+VIEW_COLUMNS = ("asset_id", "type", "serial", "status", "start_time", "certificate_id")
+
+
+class RecordStore:
+    """Wipe records in an SQLite database with a one-time import of the legacy JSON file"""
+
+    def __init__(self, path="wipe_records.db", legacy_json="wipe_records.json"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")  # Compliance records must survive power loss
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS records (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                asset_id TEXT NOT NULL UNIQUE,
+                type TEXT,
+                serial TEXT,
+                status TEXT,
+                start_time TEXT,
+                end_time TEXT,
+                certificate_id TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS records_serial ON records (serial);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+        if legacy_json:
+            self._import_legacy(legacy_json)
+
+        # In-memory indexes so duplicate checks never touch the database
+        self._ids = set()
+        self._serials = {}  # serial -> asset IDs wiped under it
+        for asset_id, serial in self._db.execute("SELECT asset_id, serial FROM records"):
+            self._index(asset_id, serial)
+
+    def _index(self, asset_id, serial):
+        self._ids.add(asset_id)
+        self._serials.setdefault(serial, set()).add(asset_id)
+
+    def _unindex(self, asset_id, serial):
+        self._ids.discard(asset_id)
+        ids = self._serials.get(serial)
+        if ids is not None:
+            ids.discard(asset_id)
+            if not ids:
+                del self._serials[serial]
+
+    @staticmethod
+    def _row(record):
+        return (record['asset_id'], record.get('type'), record.get('serial'),
+                record.get('status'), record.get('start_time'), record.get('end_time'),
+                record.get('certificate_id'), json.dumps(record))
+
+    def _import_legacy(self, legacy_json):
+        """Copy records from the old whole-file JSON store, once"""
+        with self._lock:
+            done = self._db.execute(
+                "SELECT value FROM meta WHERE key = 'legacy_imported'").fetchone()
+            if done or not os.path.exists(legacy_json):
+                return
+            try:
+                with open(legacy_json, 'r') as f:
+                    records = json.load(f)
+            except (OSError, ValueError):
+                records = []
+
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO records (asset_id, type, serial, status, start_time, "
+                "end_time, certificate_id, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._row(record) for record in records])
+            self._db.execute("INSERT INTO meta (key, value) VALUES ('legacy_imported', ?)",
+                             (legacy_json,))
+            self._db.execute("COMMIT")
+
+    def append(self, record):
+        """Add one record; a single-row insert regardless of history size"""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO records (asset_id, type, serial, status, start_time, "
+                "end_time, certificate_id, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._row(record))
+            self._index(record['asset_id'], record.get('serial'))
+
+    def delete(self, asset_id):
+        """Remove a record by asset ID, returning whether it existed"""
+        with self._lock:
+            if asset_id not in self._ids:
+                return False
+            row = self._db.execute("SELECT serial FROM records WHERE asset_id = ?",
+                                   (asset_id,)).fetchone()
+            if row is None:
+                return False
+            self._db.execute("DELETE FROM records WHERE asset_id = ?", (asset_id,))
+            self._unindex(asset_id, row[0])
+            return True
+
+    def __contains__(self, asset_id):
+        return asset_id in self._ids
+
+    def assets_for_serial(self, serial):
+        """Asset IDs already wiped under a serial number"""
+        with self._lock:
+            return sorted(self._serials.get(serial, ()))
+
+    def get(self, asset_id):
+        """Full record for an asset ID, or None"""
+        if asset_id not in self._ids:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT data FROM records WHERE asset_id = ?",
+                                   (asset_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count(self):
+        return len(self._ids)
+
+    def rows(self, before=None, limit=-1):
+        """(seq, *VIEW_COLUMNS) newest first, optionally only records older than seq before"""
+        with self._lock:
+            if before is None:
+                return self._db.execute(
+                    f"SELECT seq, {', '.join(VIEW_COLUMNS)} FROM records "
+                    f"ORDER BY seq DESC LIMIT ?", (limit,)).fetchall()
+            return self._db.execute(
+                f"SELECT seq, {', '.join(VIEW_COLUMNS)} FROM records WHERE seq < ? "
+                f"ORDER BY seq DESC LIMIT ?", (before, limit)).fetchall()
+
+    def all(self):
+        """Every full record, oldest first"""
+        with self._lock:
+            rows = self._db.execute("SELECT data FROM records ORDER BY seq").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()